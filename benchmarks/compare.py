@@ -0,0 +1,62 @@
+"""Compare two result files written by benchmarks/run.py.
+
+    python benchmarks/compare.py before.json after.json [--threshold 10]
+
+Exits with 1 when a hook got slower by more than the threshold (in percent).
+"""
+import argparse
+import json
+import sys
+from typing import Optional
+from typing import Sequence
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=10.0,
+        help='Slowdown, in percent of the wall time, reported as a regression (default: 10)',
+    )
+    args = parser.parse_args(argv)
+
+    with open(args.before) as before_file:
+        before = json.load(before_file)
+    with open(args.after) as after_file:
+        after = json.load(after_file)
+
+    for report in (before, after):
+        meta = report['metadata']
+        print('{}: {} files of {} bytes, python {}'.format(
+            meta['revision'], meta['count'], meta['size'], meta['python']))
+    if any(before['metadata'][key] != after['metadata'][key] for key in ('count', 'size', 'seed')):
+        print('WARNING: the corpora differ, timings are not comparable')
+    print()
+
+    retv = 0
+    for hook in sorted(set(before['results']) & set(after['results'])):
+        old, new = before['results'][hook], after['results'][hook]
+        if 'error' in old or 'error' in new or not old['wall_s']:
+            print(f'{hook:45} skipped (error)')
+            continue
+        change = (new['wall_s'] - old['wall_s']) / old['wall_s'] * 100
+        rss_change = new['peak_rss_kib'] - old['peak_rss_kib']
+        flag = ''
+        if change > args.threshold:
+            flag = '  REGRESSION'
+            retv = 1
+        print(
+            f'{hook:45} {old["wall_s"]:8.3f} s -> {new["wall_s"]:8.3f} s ({change:+6.1f} %) '
+            f'RSS {rss_change:+8d} KiB{flag}'
+        )
+    return retv
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,290 @@
+"""Synthetic corpora for the hook benchmarks.
+
+Every generator writes `count` files of roughly `size` bytes in `directory`
+and returns their names, relative to `directory`.  Contents are derived from
+`random.Random(seed)` so that two runs produce the same corpus.
+"""
+import json
+import os
+import random
+import subprocess
+from typing import Callable
+from typing import Dict
+from typing import List
+
+WORDS = (
+    'alpha bravo charlie delta echo foxtrot golf hotel india juliett kilo lima mike '
+    'november oscar papa quebec romeo sierra tango uniform victor whiskey xray yankee zulu'
+).split()
+
+
+def _words(rng: random.Random, count: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+
+def _write(directory: str, name: str, contents: bytes) -> str:
+    path = os.path.join(directory, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as file_handler:
+        file_handler.write(contents)
+    return name
+
+
+def _fill(rng: random.Random, size: int, make_chunk: Callable[[random.Random, int], str]) -> str:
+    chunks = []
+    length = 0
+    index = 0
+    while length < size:
+        chunk = make_chunk(rng, index)
+        chunks.append(chunk)
+        length += len(chunk)
+        index += 1
+    return ''.join(chunks)
+
+
+def _python_chunk(rng: random.Random, index: int) -> str:
+    return (
+        f'\n\ndef function_{index}(value, other=None):\n'
+        f'    """{_words(rng, 6)}."""\n'
+        f'    result = [item * {rng.randint(1, 9)} for item in range(value)]\n'
+        f'    mapping = {{"key_{index}": result, "other": other}}\n'
+        f'    if value > {rng.randint(0, 100)}:\n'
+        f'        return mapping\n'
+        f'    return "{_words(rng, 3)}"\n'
+    )
+
+
+def python_files(directory: str, count: int, size: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    header = '"""Synthetic module."""\nimport os\nimport sys\n'
+    return [
+        _write(
+            directory, f'pkg{i % 16}/module_{i}.py',
+            (header + _fill(rng, size, _python_chunk)).encode()
+        ) for i in range(count)
+    ]
+
+
+def _json_value(rng: random.Random, size: int) -> Dict[str, object]:
+    value: Dict[str, object] = {}
+    while len(json.dumps(value)) < size:
+        key = '{}_{}'.format(rng.choice(WORDS), len(value))
+        value[key] = rng.choice(
+            (
+                rng.randint(0, 10**6),
+                _words(rng, 4),
+                [rng.random() for _ in range(4)],
+                {'nested': _words(rng, 2), 'flag': rng.random() > 0.5},
+            )
+        )
+    return value
+
+
+def json_files(directory: str, count: int, size: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        _write(directory, f'data/file_{i}.json', json.dumps(_json_value(rng, size)).encode())
+        for i in range(count)
+    ]
+
+
+def yaml_files(directory: str, count: int, size: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+
+    def chunk(rng: random.Random, index: int) -> str:
+        return (
+            f'key_{index}:\n'
+            f'  name: {_words(rng, 3)}\n'
+            f'  count: {rng.randint(0, 1000)}\n'
+            f'  tags: [{rng.choice(WORDS)}, {rng.choice(WORDS)}]\n'
+        )
+
+    return [
+        _write(directory, f'config/file_{i}.yaml', ('---\n' + _fill(rng, size, chunk)).encode())
+        for i in range(count)
+    ]
+
+
+def toml_files(directory: str, count: int, size: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+
+    def chunk(rng: random.Random, index: int) -> str:
+        return (
+            f'[section_{index}]\n'
+            f'name = "{_words(rng, 3)}"\n'
+            f'count = {rng.randint(0, 1000)}\n'
+            f'tags = ["{rng.choice(WORDS)}", "{rng.choice(WORDS)}"]\n\n'
+        )
+
+    return [
+        _write(directory, f'config/file_{i}.toml', _fill(rng, size, chunk).encode())
+        for i in range(count)
+    ]
+
+
+def xml_files(directory: str, count: int, size: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+
+    def chunk(rng: random.Random, index: int) -> str:
+        return (
+            f'  <item id="{index}" kind="{rng.choice(WORDS)}">\n'
+            f'    <name>{_words(rng, 3)}</name>\n'
+            f'  </item>\n'
+        )
+
+    return [
+        _write(
+            directory, f'xml/file_{i}.xml',
+            ('<?xml version="1.0"?>\n<root>\n' + _fill(rng, size, chunk) + '</root>\n').encode()
+        ) for i in range(count)
+    ]
+
+
+def _html_chunk(rng: random.Random, index: int) -> str:
+    return (
+        f'    <div class="block-{index % 20} {rng.choice(WORDS)}" data-index="{index}">\n'
+        f'      <p>{_words(rng, 12)}</p>\n'
+        f'      <img src="image_{index}.png" alt="{rng.choice(WORDS)}">\n'
+        f'    </div>\n'
+    )
+
+
+def html_files(directory: str, count: int, size: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        _write(
+            directory, f'html/page_{i}.html',
+            (
+                '<!DOCTYPE html>\n<html lang="en">\n  <head><title>Page</title></head>\n'
+                '  <body>\n' + _fill(rng, size, _html_chunk) + '  </body>\n</html>\n'
+            ).encode()
+        ) for i in range(count)
+    ]
+
+
+def css_files(directory: str, count: int, size: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+
+    def chunk(rng: random.Random, index: int) -> str:
+        return f'.block-{index % 20} .{rng.choice(WORDS)} {{ margin: {rng.randint(0, 9)}px; }}\n'
+
+    return [
+        _write(directory, f'css/style_{i}.css', _fill(rng, size, chunk).encode())
+        for i in range(count)
+    ]
+
+
+def html_and_css_files(directory: str, count: int, size: int, seed: int) -> List[str]:
+    return html_files(directory, count, size, seed) + css_files(directory, count, size, seed)
+
+
+def requirements_files(directory: str, count: int, size: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+
+    def chunk(rng: random.Random, index: int) -> str:
+        comment = f'# {_words(rng, 4)}\n' if rng.random() < 0.2 else ''
+        return f'{comment}{rng.choice(WORDS)}-{index}=={rng.randint(0, 9)}.{rng.randint(0, 20)}\n'
+
+    return [
+        _write(directory, f'req_{i}/requirements.txt', _fill(rng, size, chunk).encode())
+        for i in range(count)
+    ]
+
+
+def _text_files(
+    directory: str,
+    count: int,
+    size: int,
+    seed: int,
+    make_line: Callable[[random.Random], str],
+) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        _write(
+            directory, f'text/file_{i}.txt',
+            _fill(rng, size, lambda rng, _: make_line(rng)).encode()
+        ) for i in range(count)
+    ]
+
+
+def text_files(directory: str, count: int, size: int, seed: int) -> List[str]:
+    return _text_files(directory, count, size, seed, lambda rng: _words(rng, 10) + '\n')
+
+
+def crlf_files(directory: str, count: int, size: int, seed: int) -> List[str]:
+    return _text_files(directory, count, size, seed, lambda rng: _words(rng, 10) + '\r\n')
+
+
+def tabs_files(directory: str, count: int, size: int, seed: int) -> List[str]:
+    return _text_files(directory, count, size, seed, lambda rng: '\t' + _words(rng, 10) + '\n')
+
+
+def trailing_whitespace_files(directory: str, count: int, size: int, seed: int) -> List[str]:
+    return _text_files(
+        directory, count, size, seed, lambda rng: _words(rng, 10) + ' ' * rng.randint(0, 3) + '\n'
+    )
+
+
+def _git(directory: str, *args: str, **env: str) -> None:
+    subprocess.run(
+        ('git', '-C', directory) + args,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        env=dict(os.environ, **env),
+    )
+
+
+def git_repository(directory: str, count: int, size: int, seed: int) -> List[str]:
+    """Repository with `count` staged text files and a history by many authors."""
+    rng = random.Random(seed)
+    _git(directory, 'init', '-q')
+    authors = [(f'{name.title()} {i}', f'{name}{i}@example.com') for i, name in enumerate(WORDS)]
+    for commit in range(max(count // 10, 1)):
+        name, email = rng.choice(authors)
+        if rng.random() < 0.1:
+            name = name.lower()  # same email under another name
+        _git(
+            directory,
+            'commit',
+            '-q',
+            '--allow-empty',
+            '-m',
+            f'commit {commit}',
+            GIT_AUTHOR_NAME=name,
+            GIT_AUTHOR_EMAIL=email,
+            GIT_COMMITTER_NAME=name,
+            GIT_COMMITTER_EMAIL=email,
+        )
+    filenames = text_files(directory, count, size, seed)
+    _git(directory, 'add', '--', *filenames)
+    return filenames
+
+
+def commit_message(directory: str, count: int, size: int, seed: int) -> List[str]:
+    # pylint: disable=unused-argument
+    return [_write(directory, 'COMMIT_EDITMSG', b'[+] Synthetic commit message\n')]
+
+
+def nothing(directory: str, count: int, size: int, seed: int) -> List[str]:
+    # pylint: disable=unused-argument
+    return []
+
+
+CORPORA: Dict[str, Callable[[str, int, int, int], List[str]]] = {
+    'python': python_files,
+    'json': json_files,
+    'yaml': yaml_files,
+    'toml': toml_files,
+    'xml': xml_files,
+    'html': html_files,
+    'css': css_files,
+    'html+css': html_and_css_files,
+    'requirements': requirements_files,
+    'text': text_files,
+    'crlf': crlf_files,
+    'tabs': tabs_files,
+    'trailing-whitespace': trailing_whitespace_files,
+    'git': git_repository,
+    'commit-message': commit_message,
+    'nothing': nothing,
+}
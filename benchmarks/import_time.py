@@ -0,0 +1,124 @@
+"""Check the import time of every hook entry point against a budget.
+
+pre-commit splits the staged files in batches and starts each hook once per
+batch, so the import of a hook module is paid many times per commit.  Each
+console script listed in setup.py is imported in a fresh interpreter with
+`python -X importtime`; the best of `--repeat` runs is compared to its budget:
+
+    python benchmarks/import_time.py [--repeat 5] [--budget-ms 40] [--top 5]
+
+Exits with 1 when a hook exceeds its budget.  Hooks whose dependencies are not
+installed are reported and skipped.
+"""
+import argparse
+import ast
+import os
+import re
+import subprocess
+import sys
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOOKS_DIR = os.path.join(ROOT, 'hooks')
+DEFAULT_BUDGET_MS = 40.0
+# Hooks which cannot do anything without a third-party parser
+BUDGETS_MS: Dict[str, float] = {
+    'html-attributes-blacklist': 150.0,
+    'html-detect-missing-css-classes': 150.0,
+    'html-forbid-img-without-alt-text': 150.0,
+    'html-forbid-non-std-attributes': 150.0,
+    'html-tags-blacklist': 150.0,
+    'python-safety-checks': 300.0,
+    'rst-linter': 300.0,
+    'toml-check-syntax': 80.0,
+}
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def console_scripts() -> List[str]:
+    """SCRIPTS from setup.py, read without running setup()."""
+    with open(os.path.join(ROOT, 'setup.py')) as setup_file:
+        tree = ast.parse(setup_file.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == 'SCRIPTS' for target in node.targets
+        ):
+            return list(ast.literal_eval(node.value))
+    raise ValueError('SCRIPTS not found in setup.py')
+
+
+def import_times(script: str) -> Tuple[Optional[Dict[str, int]], str]:
+    """Cumulative import time in µs of every module imported by `script`, or an error."""
+    module_name = 'python.{}'.format(script.replace('-', '_'))
+    proc = subprocess.run(
+        (sys.executable, '-X', 'importtime', '-c', 'import ' + module_name),
+        cwd=HOOKS_DIR,
+        env=dict(os.environ, PYTHONPATH=HOOKS_DIR),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        check=False,
+    )
+    stderr = proc.stderr.decode(errors='replace')
+    if proc.returncode:
+        return None, stderr.strip().splitlines()[-1]
+    times = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            times[match.group(4)] = int(match.group(2))
+    return times, ''
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per hook, best is kept')
+    parser.add_argument(
+        '--budget-ms',
+        type=float,
+        default=DEFAULT_BUDGET_MS,
+        help='Budget of the hooks without their own (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--top', type=int, default=5, help='Slowest imports shown for a hook over budget'
+    )
+    parser.add_argument('scripts', nargs='*', help='Console scripts to check (default: all)')
+    args = parser.parse_args(argv)
+
+    retv = 0
+    for script in args.scripts or console_scripts():
+        module_name = 'python.{}'.format(script.replace('-', '_'))
+        best: Optional[Dict[str, int]] = None
+        error = ''
+        for _ in range(args.repeat):
+            times, error = import_times(script)
+            if times is None:
+                break
+            if best is None or times[module_name] < best[module_name]:
+                best = times
+        if best is None:
+            print(f'{script:45} skipped: {error}')
+            continue
+
+        budget = BUDGETS_MS.get(script, args.budget_ms)
+        elapsed = best[module_name] / 1000
+        status = 'ok' if elapsed <= budget else 'OVER BUDGET'
+        print(f'{script:45} {elapsed:7.1f} ms / {budget:5.0f} ms  {status}')
+        if elapsed > budget:
+            retv = 1
+            slowest = sorted(
+                (name for name in best if name != module_name), key=best.__getitem__, reverse=True
+            )
+            for name in slowest[:args.top]:
+                print(f'    {name:41} {best[name] / 1000:7.1f} ms')
+    return retv
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""Benchmark the hook entry points on synthetic corpora.
+
+Each hook runs in its own interpreter, on a fresh copy of its corpus, as
+pre-commit would run it.  Results are written as JSON and can be compared
+with benchmarks/compare.py:
+
+    python benchmarks/run.py --count 500 --size 8192 --output before.json
+    python benchmarks/run.py --count 500 --size 8192 --output after.json
+    python benchmarks/compare.py before.json after.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any
+from typing import Dict
+from typing import NamedTuple
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import CORPORA  # noqa: E402 pylint: disable=wrong-import-position
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOOKS_DIR = os.path.join(ROOT, 'hooks')
+RUNNER = (
+    'import inspect, sys\n'
+    'from python.{} import main\n'
+    'sys.exit(main(sys.argv[1:]) if inspect.signature(main).parameters else main())\n'
+)
+
+
+class Benchmark(NamedTuple):
+    corpus: str
+    args: Tuple[str, ...] = ()
+    pass_filenames: bool = True
+
+
+BENCHMARKS: Dict[str, Benchmark] = {
+    'git-check-mailmap': Benchmark('git', pass_filenames=False),
+    'git-check': Benchmark('git'),
+    'git-dirty': Benchmark('git', pass_filenames=False),
+    'git-check-added-large-files': Benchmark('git', ('--maxkb=1', )),
+    'git-check-merge-conflict': Benchmark('text', ('--assume-in-merge', )),
+    'git-commit-msg': Benchmark('commit-message'),
+    'generic-check-byte-order-marker': Benchmark('text'),
+    'generic-check-case-conflict': Benchmark('git'),
+    'generic-check-executables-have-shebangs': Benchmark('text'),
+    'generic-check-symlinks': Benchmark('text'),
+    'generic-check-vcs-permalinks': Benchmark('text'),
+    'generic-detect-private-key': Benchmark('text'),
+    'generic-end-of-file-fixer': Benchmark('text'),
+    'generic-trailing-whitespace-fixer': Benchmark('trailing-whitespace'),
+    'generic-crlf-forbid': Benchmark('crlf'),
+    'generic-crlf-remove': Benchmark('crlf'),
+    'generic-mixed-line-ending': Benchmark('crlf', ('--fix=no', )),
+    'generic-tabs-forbid': Benchmark('tabs'),
+    'generic-tabs-remove': Benchmark('tabs', ('--whitespaces-count=4', )),
+    'generic-confusables': Benchmark('text'),
+    'generic-scan': Benchmark('text', ('--assume-in-merge', )),
+    'generic-fix-pipeline': Benchmark(
+        'trailing-whitespace',
+        ('--stage=generic-trailing-whitespace-fixer', '--stage=generic-end-of-file-fixer'),
+    ),
+    'c-create-clang-format-cfg': Benchmark('nothing'),
+    'cmake-create-cmake-format-cfg': Benchmark('nothing'),
+    'html-validate': Benchmark('html'),
+    'html-detect-missing-css-classes': Benchmark(
+        'html+css', ('--css-files-dir=css', '--html-files-dir=html'), pass_filenames=False
+    ),
+    'html-attributes-blacklist': Benchmark('html', ('--forbidden-attributes=style,onclick', )),
+    'html-forbid-img-without-alt-text': Benchmark('html'),
+    'html-forbid-non-std-attributes': Benchmark('html'),
+    'html-tags-blacklist': Benchmark('html', ('--forbidden-tags=script,iframe', )),
+    'json-check-syntax': Benchmark('json'),
+    'json-pretty-format': Benchmark('json', ('--autofix', '--indent=2')),
+    'python-check-ast': Benchmark('python'),
+    'python-check-builtin-literals': Benchmark('python'),
+    'python-check-docstring-first': Benchmark('python'),
+    'python-debug-statement-hook': Benchmark('python'),
+    'python-double-quote-string-fixer': Benchmark('python'),
+    'python-fix-encoding-pragma': Benchmark('python', ('--remove', )),
+    'python-requirements-txt-fixer': Benchmark('requirements'),
+    'python-safety-checks': Benchmark('requirements'),
+    'python-isort-config': Benchmark('nothing'),
+    'python-pylint-config': Benchmark('nothing'),
+    'rst-linter': Benchmark('text'),
+    'toml-check-syntax': Benchmark('toml'),
+    'xml-check-syntax': Benchmark('xml'),
+    'yaml-check-syntax': Benchmark('yaml'),
+}
+
+
+def _tree_size(directory: str, filenames: Sequence[str]) -> int:
+    return sum(os.path.getsize(os.path.join(directory, filename)) for filename in filenames)
+
+
+def _run_once(hook: str, benchmark: Benchmark, corpus_dir: str,
+              filenames: Sequence[str]) -> Tuple[float, float, int, int, str]:
+    """Wall time, CPU time, peak RSS (KiB), exit code and stderr of one run."""
+    with tempfile.TemporaryDirectory(prefix='pch-bench-') as workdir:
+        workdir = os.path.join(workdir, 'corpus')
+        shutil.copytree(corpus_dir, workdir, symlinks=True)
+        cmd = [sys.executable, '-c', RUNNER.format(hook.replace('-', '_'))]
+        cmd.extend(benchmark.args)
+        if benchmark.pass_filenames:
+            cmd.extend(filenames)
+        # The result cache would measure the second run, not the hook
+        env = dict(os.environ, PYTHONPATH=HOOKS_DIR, PCH_NO_CACHE='1')
+
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            cmd,
+            cwd=workdir,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        stderr = proc.stderr.read() if proc.stderr is not None else b''
+        _, status, rusage = os.wait4(proc.pid, 0)
+        wall = time.perf_counter() - start
+        proc.returncode = os.waitstatus_to_exitcode(status)
+
+    cpu = rusage.ru_utime + rusage.ru_stime
+    return wall, cpu, rusage.ru_maxrss, proc.returncode, stderr.decode(errors='replace')
+
+
+def run_benchmark(
+    hook: str,
+    benchmark: Benchmark,
+    count: int,
+    size: int,
+    repeat: int,
+    seed: int,
+) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix='pch-corpus-') as corpus_dir:
+        filenames = CORPORA[benchmark.corpus](corpus_dir, count, size, seed)
+        total_bytes = _tree_size(corpus_dir, filenames)
+        runs = [_run_once(hook, benchmark, corpus_dir, filenames) for _ in range(repeat)]
+
+    walls = sorted(run[0] for run in runs)
+    wall = walls[len(walls) // 2]
+    result: Dict[str, Any] = {
+        'corpus': benchmark.corpus,
+        'files': len(filenames),
+        'bytes': total_bytes,
+        'wall_s': wall,
+        'wall_min_s': walls[0],
+        'cpu_s': sorted(run[1] for run in runs)[len(runs) // 2],
+        'peak_rss_kib': max(run[2] for run in runs),
+        'files_per_s': len(filenames) / wall if wall else None,
+        'mb_per_s': total_bytes / 1e6 / wall if wall else None,
+        'exit_code': runs[-1][3],
+    }
+    if 'Traceback' in runs[-1][4]:
+        # Missing optional dependency, or a crash: do not compare these timings
+        result['error'] = runs[-1][4].strip().splitlines()[-1]
+    return result
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ('git', '-C', ROOT, 'rev-parse', 'HEAD'),
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--count', type=int, default=200, help='Files per corpus')
+    parser.add_argument('--size', type=int, default=8192, help='Approximate bytes per file')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per hook, median is kept')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--hook',
+        dest='hooks',
+        action='append',
+        choices=sorted(BENCHMARKS),
+        metavar='HOOK',
+        help='Hook to benchmark, can be repeated (default: all)',
+    )
+    parser.add_argument('--output', help='JSON file to write the results to')
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Any] = {}
+    for hook in args.hooks or sorted(BENCHMARKS):
+        result = run_benchmark(hook, BENCHMARKS[hook], args.count, args.size, args.repeat,
+                               args.seed)
+        results[hook] = result
+        if 'error' in result:
+            print(f'{hook:45} error: {result["error"]}')
+        else:
+            print(
+                f'{hook:45} {result["wall_s"]:8.3f} s {result["files_per_s"]:10.1f} files/s '
+                f'{result["mb_per_s"]:8.2f} MB/s {result["peak_rss_kib"]:8d} KiB'
+            )
+
+    report: Dict[str, Any] = {
+        'metadata': {
+            'revision': _git_revision(),
+            'date': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'count': args.count,
+            'size': args.size,
+            'repeat': args.repeat,
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+            output.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,8 @@
 from pathlib import Path
 import sys
 
+from python.timings import timed
+
 CONFIG_PATH = Path('.clang-format')
 DEFAULT_CONTENT = \
 r'''---
@@ -182,6 +184,7 @@ UseTab:          Never
 '''
 
 
+@timed
 def main():
     if not CONFIG_PATH.exists():
         with CONFIG_PATH.open('w') as cfg_fh:
@@ -1,6 +1,8 @@
 from pathlib import Path
 import sys
 
+from python.timings import timed
+
 CONFIG_PATH = Path('.cmake-format.yaml')
 DEFAULT_CONTENT = \
 r'''---
@@ -23,6 +25,7 @@ format:
   max_pargs_hwrap: 2
 '''
 
+@timed
 def main():
     if not CONFIG_PATH.exists():
         with CONFIG_PATH.open('w') as cfg_fh:
@@ -1,23 +1,32 @@
+from __future__ import annotations
+
 import argparse
 import sys
-from typing import Optional
-from typing import Sequence
+
+from python.util import add_runner_arguments
+from python.util import probe_header
+from python.util import run_per_file
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Optional
+    from typing import Sequence
+
+
+def check_file(filename: str) -> int:
+    if probe_header(filename).bom:
+        print('{}: Has a byte-order marker'.format(filename))
+        return 1
+    return 0
 
 
 def main(argv: Optional[Sequence[str]] = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*', help='Filenames to check')
+    add_runner_arguments(parser)
     args = parser.parse_args(argv)
 
-    retv = 0
-
-    for filename in args.filenames:
-        with open(filename, 'rb') as file_handler:
-            if file_handler.read(3) == b'\xef\xbb\xbf':
-                retv = 1
-                print('{}: Has a byte-order marker'.format(file_handler))
-
-    return retv
+    return run_per_file(check_file, args.filenames, args)
 
 
 if __name__ == '__main__':
@@ -1,44 +1,174 @@
+"""Forbid paths which would collide on a case-insensitive file system.
+
+Two paths collide when they are equal once lowercased and normalized to NFD,
+as on macOS, so that NFC and NFD spellings of the same name collide too.
+Directories are compared as well: `Foo/x` collides with `foo/y`, and a file
+`foo` with a directory `Foo/`.
+
+The folded names of the committed tree are kept in an index in the git
+directory, with one entry per path and per directory prefix, so that each
+run only looks up the names of the new paths.  The index is brought up to
+date from the differences between the tree it was built for and HEAD; the
+staged changes are applied over it in memory.
+"""
 import argparse
+import collections
+import os
+import sqlite3
 import sys
+import unicodedata
+from typing import Counter
+from typing import Dict
 from typing import Iterable
+from typing import List
 from typing import Optional
 from typing import Sequence
 from typing import Set
+from typing import Tuple
 
-from python.util import added_files
+from python.timings import timed
+from python.util import CalledProcessError
 from python.util import cmd_output
+from python.util import EMPTY_TREE
+from python.util import git_dir
+from python.util import head_tree
+
+INDEX_FILENAME = 'pch-case-index.sqlite'
+# Bumped when the folding of names changes, to rebuild the indexes
+INDEX_VERSION = '1'
+
+
+def fold(name: str) -> str:
+    return unicodedata.normalize('NFD', unicodedata.normalize('NFD', name).lower())
+
+
+def prefixes(path: str) -> List[str]:
+    """Directory prefixes of `path`, with their trailing slash, then `path`."""
+    parts = path.split('/')
+    return ['/'.join(parts[:i]) + '/' for i in range(1, len(parts))] + [path]
+
+
+def name_status(command: str, *args: str) -> List[Tuple[str, str]]:
+    """Status letter and path of each change listed by `git diff-* --name-status -z`."""
+    cmd = ('git', command, '-r', '-z', '--no-renames', '--name-status') + args
+    fields = cmd_output(*cmd).split('\0')
+    return list(zip(fields[0:-1:2], fields[1::2]))
 
 
-def lower_set(iterable: Iterable[str]) -> Set[str]:
-    return {x.lower() for x in iterable}
+def name_counts(changes: Iterable[Tuple[str, str]]) -> Counter[str]:
+    """Paths and directories added (positive) or removed (negative) by `changes`."""
+    counts: Counter[str] = collections.Counter()
+    for status, path in changes:
+        delta = {'A': 1, 'D': -1}.get(status)
+        if delta is not None:
+            for name in prefixes(path):
+                counts[name] += delta
+    return counts
 
 
-def find_conflicting_filenames(filenames: Sequence[str]) -> int:
-    repo_files = set(cmd_output('git', 'ls-files').splitlines())
-    relevant_files = set(filenames) | added_files()
-    repo_files -= relevant_files
-    retv = 0
+def by_folded(names: Iterable[str]) -> Dict[str, Set[str]]:
+    grouped: Dict[str, Set[str]] = collections.defaultdict(set)
+    for name in names:
+        grouped[fold(name.rstrip('/'))].add(name)
+    return grouped
 
-    # new file conflicts with existing file
-    conflicts = lower_set(repo_files) & lower_set(relevant_files)
 
-    # new file conflicts with other new file
-    lowercase_relevant_files = lower_set(relevant_files)
-    for filename in set(relevant_files):
-        if filename.lower() in lowercase_relevant_files:
-            lowercase_relevant_files.remove(filename.lower())
-        else:
-            conflicts.add(filename.lower())
+class CaseIndex:
+    """Names of a tree, with the number of paths each one stands for."""
+    def __init__(self, path: str) -> None:
+        self.connection = sqlite3.connect(path, timeout=30)
+        with self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)'
+            )
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS names '
+                '(name TEXT PRIMARY KEY, folded TEXT NOT NULL, count INTEGER NOT NULL)'
+            )
+            self.connection.execute('CREATE INDEX IF NOT EXISTS names_folded ON names (folded)')
 
-    if conflicts:
-        conflicting_files = [x for x in repo_files | relevant_files if x.lower() in conflicts]
-        for filename in sorted(conflicting_files):
-            print(f'Case-insensitivity conflict found: {filename}')
-        retv = 1
+    @classmethod
+    def open(cls, no_cache: bool) -> 'CaseIndex':
+        """Index of the git directory, in memory if it cannot be used."""
+        if not no_cache:
+            try:
+                return cls(os.path.join(git_dir(), INDEX_FILENAME))
+            except (OSError, sqlite3.Error):
+                pass
+        return cls(':memory:')
 
-    return retv
+    def _meta(self, key: str) -> Optional[str]:
+        row = self.connection.execute('SELECT value FROM meta WHERE key = ?', (key, )).fetchone()
+        return row[0] if row else None
 
+    def update(self, tree: str) -> None:
+        """Make the index describe `tree`."""
+        indexed_tree = self._meta('tree')
+        if indexed_tree == tree and self._meta('version') == INDEX_VERSION:
+            return
+        changes = None
+        if indexed_tree is not None and self._meta('version') == INDEX_VERSION:
+            try:
+                changes = name_status('diff-tree', indexed_tree, tree)
+            except CalledProcessError:  # the indexed tree was garbage collected
+                pass
+        with self.connection:
+            if changes is None:
+                self.connection.execute('DELETE FROM names')
+                changes = name_status('diff-tree', EMPTY_TREE, tree)
+            self.connection.executemany(
+                'INSERT INTO names (name, folded, count) VALUES (?, ?, ?) '
+                'ON CONFLICT (name) DO UPDATE SET count = count + excluded.count',
+                (
+                    (name, fold(name.rstrip('/')), count)
+                    for name, count in name_counts(changes).items() if count
+                ),
+            )
+            self.connection.execute('DELETE FROM names WHERE count <= 0')
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                (('tree', tree), ('version', INDEX_VERSION)),
+            )
 
+    def spellings(self, folded: str) -> Dict[str, int]:
+        cursor = self.connection.execute(
+            'SELECT name, count FROM names WHERE folded = ?',
+            (folded, ),
+        )
+        return dict(cursor.fetchall())
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def find_conflicting_filenames(filenames: Sequence[str], no_cache: bool = False) -> int:
+    tree = head_tree()
+    index = CaseIndex.open(no_cache)
+    try:
+        index.update(tree)
+        staged = name_status('diff-index', '--cached', tree)
+        staged_counts = name_counts(staged)
+        relevant = set(filenames) | {path for status, path in staged if status == 'A'}
+        relevant_names = by_folded(name for path in relevant for name in prefixes(path))
+        staged_names = by_folded(staged_counts)
+
+        conflicts: Set[str] = set()
+        for folded, names in relevant_names.items():
+            counts = collections.Counter(index.spellings(folded))
+            for name in staged_names.get(folded, ()):
+                counts[name] += staged_counts[name]
+            spellings = names | {name for name, count in counts.items() if count > 0}
+            if len(spellings) > 1:
+                conflicts |= spellings
+    finally:
+        index.close()
+
+    for name in sorted(conflicts):
+        print(f'Case-insensitivity conflict found: {name}')
+    return 1 if conflicts else 0
+
+
+@timed
 def main(argv: Optional[Sequence[str]] = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -46,10 +176,16 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         nargs='*',
         help='Filenames pre-commit believes are changed.',
     )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        default=bool(os.environ.get('PCH_NO_CACHE')),
+        help='Do not use the index of the committed names kept in the git directory',
+    )
 
     args = parser.parse_args(argv)
 
-    return find_conflicting_filenames(args.filenames)
+    return find_conflicting_filenames(args.filenames, args.no_cache)
 
 
 if __name__ == '__main__':
@@ -1,16 +1,36 @@
-"""Check that executable text files have a shebang."""
+"""Check that executable text files have a shebang.
+
+Whether a file is executable is taken from its staged mode, read for all
+the files at once, and its first two bytes from its staged blob, so that the
+commit is checked rather than the work tree.  Files which are not staged
+are all checked, from the work tree.
+"""
 import argparse
+import functools
+import os
 import shlex
 import sys
+from typing import Dict
 from typing import Optional
 from typing import Sequence
 
+from python.util import add_runner_arguments
+from python.util import git_cat_file
+from python.util import open_bytes
+from python.util import run_per_file
+from python.util import staged_entries
+
+
+def first_bytes(path: str, oid: Optional[str]) -> bytes:
+    """Start of the shebang: of the staged blob `oid`, or of the file without one."""
+    if oid is not None:
+        return git_cat_file().head(oid, 2) or b''
+    with open_bytes(path) as file_handler:
+        return file_handler.read(2)
 
-def check_has_shebang(path: str) -> int:
-    with open(path, 'rb') as file_handler:
-        first_bytes = file_handler.read(2)
 
-    if first_bytes != b'#!':
+def check_has_shebang(path: str, oids: Optional[Dict[str, str]] = None) -> int:
+    if first_bytes(path, (oids or {}).get(os.path.normpath(path))) != b'#!':
         quoted = shlex.quote(path)
         print(
             '{}: marked executable but has no (or invalid) shebang!\n'.format(path),
@@ -26,14 +46,18 @@ def check_has_shebang(path: str) -> int:
 def main(argv: Optional[Sequence[str]] = None) -> int:
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument('filenames', nargs='*')
+    add_runner_arguments(parser)
     args = parser.parse_args(argv)
 
-    retv = 0
-
-    for filename in args.filenames:
-        retv |= check_has_shebang(filename)
-
-    return retv
+    entries = staged_entries(args.filenames)
+    executables = [
+        filename for filename in args.filenames
+        if os.path.normpath(filename) not in entries or
+        entries[os.path.normpath(filename)].mode == '100755'
+    ]
+    oids = {path: entry.oid for path, entry in entries.items()}
+    check = functools.partial(check_has_shebang, oids=oids)
+    return run_per_file(check, executables, args)
 
 
 if __name__ == '__main__':
@@ -4,22 +4,33 @@ import sys
 from typing import Optional
 from typing import Sequence
 
+from python.util import add_runner_arguments
+from python.util import run_per_file
+from python.util import staged_modes
+
+
+def check_file(filename: str) -> int:
+    if (
+        os.path.islink(filename) and not os.path.exists(filename)
+    ):  # pragma: no cover (symlink support required)
+        print(f'{filename}: Broken symlink')
+        return 1
+    return 0
+
 
 def main(argv: Optional[Sequence[str]] = None) -> int:
     parser = argparse.ArgumentParser(description='Checks for broken symlinks.')
     parser.add_argument('filenames', nargs='*', help='Filenames to check')
+    add_runner_arguments(parser)
     args = parser.parse_args(argv)
 
-    retv = 0
-
-    for filename in args.filenames:
-        if (
-            os.path.islink(filename) and not os.path.exists(filename)
-        ):  # pragma: no cover (symlink support required)
-            print(f'{filename}: Broken symlink')
-            retv = 1
-
-    return retv
+    # Only the staged symlinks, and the files which are not staged, are probed
+    modes = staged_modes(args.filenames)
+    symlinks = [
+        filename for filename in args.filenames
+        if modes.get(os.path.normpath(filename), '120000') == '120000'
+    ]
+    return run_per_file(check_file, symlinks, args)
 
 
 if __name__ == '__main__':
@@ -1,37 +1,112 @@
+"""Forbid links to a line of a file on a branch, which will point elsewhere later.
+
+Links to GitHub (`/blob/BRANCH/`), GitLab (`/-/blob/BRANCH/`) and Bitbucket
+(`/src/BRANCH/`) style hosts are recognized, for the hosts and branches
+given on the command line.  Each file is searched at once, and the line
+number is only computed for the lines with a link.
+"""
+from __future__ import annotations
+
 import argparse
+import functools
+import os
 import re
 import sys
-from typing import Optional
-from typing import Sequence
 
-GITHUB_NON_PERMALINK = re.compile(br'https://github.com/[^/ ]+/[^/ ]+/blob/master/[^# ]+#L\d+', )
+from python.util import add_runner_arguments
+from python.util import read_bytes
+from python.util import run_per_file
 
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Optional
+    from typing import Pattern
+    from typing import Sequence
+    from typing import Tuple
 
-def _check_filename(filename: str) -> int:
-    retv = 0
-    with open(filename, 'rb') as file_handler:
-        for i, line in enumerate(file_handler, 1):
-            if GITHUB_NON_PERMALINK.search(line):
-                sys.stdout.write(f'{filename}:{i}:')
-                sys.stdout.flush()
-                sys.stdout.buffer.write(line)
-                retv = 1
-    return retv
+DEFAULT_HOSTS = ('github.com', )
+DEFAULT_BRANCHES = ('master', )
+
+
+def non_permalink_pattern(hosts: Sequence[str], branches: Sequence[str]) -> bytes:
+    """Regex of the links to a line on one of `branches` of a repository of `hosts`.
+
+    It does not cross lines.
+    """
+    def alternatives(names: Sequence[str]) -> bytes:
+        return b'|'.join(re.escape(name.encode()) for name in names)
+
+    # owner/repo/blob (GitHub) or owner/repo/src (Bitbucket), or
+    # group/[subgroup/...]project/-/blob (GitLab)
+    return (
+        br'https://(?:%s)/(?:[^/\s]+/[^/\s]+/(?:blob|src)|(?:[^/\s]+/)+?-/blob)/'
+        br'(?:%s)/[^#\s]+#(?:L|lines-)\d+' % (alternatives(hosts), alternatives(branches))
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def non_permalink_regex(hosts: Tuple[str, ...], branches: Tuple[str, ...]) -> Pattern[bytes]:
+    return re.compile(non_permalink_pattern(hosts, branches))
+
+
+def _check_filename(
+    filename: str,
+    hosts: Tuple[str, ...] = DEFAULT_HOSTS,
+    branches: Tuple[str, ...] = DEFAULT_BRANCHES,
+) -> int:
+    contents = read_bytes(filename)
+    output = []
+    line = 1
+    line_start = 0
+    for match in non_permalink_regex(hosts, branches).finditer(contents):
+        if match.start() < line_start:  # already reported
+            continue
+        line += contents.count(b'\n', line_start, match.start())
+        line_start = contents.rfind(b'\n', 0, match.start()) + 1
+        line_end = contents.find(b'\n', match.end()) + 1 or len(contents)
+        output.append(b'%s:%d:%s' % (os.fsencode(filename), line, contents[line_start:line_end]))
+        line += contents.count(b'\n', line_start, line_end)
+        line_start = line_end
+    if not output:
+        return 0
+    sys.stdout.flush()
+    sys.stdout.buffer.write(b''.join(output))
+    return 1
 
 
 def main(argv: Optional[Sequence[str]] = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*')
+    parser.add_argument(
+        '--host',
+        dest='hosts',
+        action='append',
+        metavar='HOST',
+        help='Host of the links to check, can be repeated (default: {})'.format(
+            ', '.join(DEFAULT_HOSTS)
+        ),
+    )
+    parser.add_argument(
+        '--branch',
+        dest='branches',
+        action='append',
+        metavar='BRANCH',
+        help='Branch whose links are not permanent, can be repeated (default: {})'.format(
+            ', '.join(DEFAULT_BRANCHES)
+        ),
+    )
+    add_runner_arguments(parser)
     args = parser.parse_args(argv)
+    args.hosts = tuple(args.hosts or DEFAULT_HOSTS)
+    args.branches = tuple(args.branches or DEFAULT_BRANCHES)
 
-    retv = 0
-    for filename in args.filenames:
-        retv |= _check_filename(filename)
+    check = functools.partial(_check_filename, hosts=args.hosts, branches=args.branches)
+    retv = run_per_file(check, args.filenames, args, cacheable=True)
 
     if retv:
         print()
-        print('Non-permanent github link detected.')
-        print('On any page on github press [y] to load a permalink.')
+        print('Non-permanent vcs link detected.')
+        print('Link to a commit instead of a branch, e.g. with the permalink of the page.')
     return retv
 
 
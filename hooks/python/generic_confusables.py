@@ -0,0 +1,166 @@
+"""Forbid or replace characters which are easily confused with ASCII ones.
+
+Characters are given by name, or by code point as U+XXXX, optionally with
+their replacement: `--char nbsp`, `--char U+2011=-`, `--char U+200B=`.
+Each file is searched once for all the characters; with `--fix`, it is
+replaced atomically, and only when it changed.
+"""
+import argparse
+import functools
+import re
+import sys
+import unicodedata
+from typing import Callable
+from typing import Dict
+from typing import NamedTuple
+from typing import Optional
+from typing import Pattern
+from typing import Sequence
+from typing import Tuple
+
+from python.timings import phase
+from python.util import add_runner_arguments
+from python.util import read_bytes
+from python.util import replace_bytes
+from python.util import run_per_file
+
+
+class Confusable(NamedTuple):
+    name: str
+    char: str
+    replacement: str
+
+
+CONFUSABLES = (
+    Confusable('nbsp', '\u00a0', ' '),
+    Confusable('narrow-nbsp', '\u202f', ' '),
+    Confusable('en-dash', '\u2013', '-'),
+    Confusable('em-dash', '\u2014', '-'),
+    Confusable('left-single-quote', '\u2018', "'"),
+    Confusable('right-single-quote', '\u2019', "'"),
+    Confusable('left-double-quote', '\u201c', '"'),
+    Confusable('right-double-quote', '\u201d', '"'),
+    Confusable('zero-width-space', '\u200b', ''),
+    Confusable('zero-width-non-joiner', '\u200c', ''),
+    Confusable('zero-width-joiner', '\u200d', ''),
+    Confusable('word-joiner', '\u2060', ''),
+)
+CONFUSABLES_BY_NAME = {confusable.name: confusable for confusable in CONFUSABLES}
+CONFUSABLES_BY_CHAR = {confusable.char: confusable for confusable in CONFUSABLES}
+# Joiners are part of emoji sequences and of some scripts
+DEFAULT_NAMES = tuple(
+    confusable.name for confusable in CONFUSABLES
+    if confusable.name not in {'zero-width-non-joiner', 'zero-width-joiner'}
+)
+
+
+def _is_scalar(code_point: int) -> bool:
+    """Whether a code point is a character which can be encoded, not a surrogate."""
+    return code_point <= sys.maxunicode and not 0xD800 <= code_point <= 0xDFFF
+
+
+def parse_char(spec: str) -> Confusable:
+    """Confusable given as NAME or U+XXXX, optionally followed by =REPLACEMENT."""
+    name, equal, replacement = spec.partition('=')
+    if name in CONFUSABLES_BY_NAME:
+        confusable = CONFUSABLES_BY_NAME[name]
+    elif re.fullmatch(r'[Uu]\+[0-9A-Fa-f]{4,6}', name) and _is_scalar(int(name[2:], 16)):
+        char = chr(int(name[2:], 16))
+        confusable = CONFUSABLES_BY_CHAR.get(char) or Confusable(
+            unicodedata.name(char, 'unnamed').lower().replace(' ', '-'), char, ''
+        )
+    else:
+        raise argparse.ArgumentTypeError(
+            'expected U+XXXX (not a surrogate) or one of {}'.format(', '.join(CONFUSABLES_BY_NAME))
+        )
+    return confusable._replace(replacement=replacement) if equal else confusable
+
+
+@functools.lru_cache(maxsize=None)
+def _regex(confusables: Tuple[Confusable, ...]) -> Pattern[bytes]:
+    # UTF-8 is prefix-free: no alternative can hide another one
+    return re.compile(b'|'.join(re.escape(item.char.encode()) for item in confusables))
+
+
+def find_confusables(
+    contents: bytes,
+    confusables: Tuple[Confusable, ...],
+) -> Dict[Tuple[int, bytes], Confusable]:
+    """Confusable found at each (line number, character), in file order."""
+    by_char = {item.char.encode(): item for item in confusables}
+    found = {}
+    line = 1
+    line_pos = 0
+    for match in _regex(confusables).finditer(contents):
+        line += contents.count(b'\n', line_pos, match.start())
+        line_pos = match.start()
+        found.setdefault((line, match.group()), by_char[match.group()])
+    return found
+
+
+def replace_confusables(
+    contents: bytes,
+    filename: str = '',  # pylint: disable=unused-argument
+    confusables: Tuple[Confusable, ...] = (),
+) -> bytes:
+    replacements = {item.char.encode(): item.replacement.encode() for item in confusables}
+    return _regex(confusables).sub(lambda match: replacements[match.group()], contents)
+
+
+def check_file(filename: str, confusables: Tuple[Confusable, ...], fix: bool) -> int:
+    contents = read_bytes(filename)
+    with phase('check'):
+        found = find_confusables(contents, confusables)
+    for (line, _), item in found.items():
+        print('{}:{}: {} U+{:04X}'.format(filename, line, item.name, ord(item.char)))
+    if found and fix:
+        replace_bytes(filename, replace_confusables(contents, confusables=confusables))
+        print('Fixing {}'.format(filename))
+    return 1 if found else 0
+
+
+def _make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('filenames', nargs='*', help='Filenames to check')
+    parser.add_argument(
+        '--char',
+        dest='chars',
+        action='append',
+        type=parse_char,
+        metavar='NAME|U+XXXX[=REPLACEMENT]',
+        help='Character to look for, can be repeated (default: {})'.format(
+            ', '.join(DEFAULT_NAMES)
+        ),
+    )
+    parser.add_argument(
+        '--fix',
+        action='store_true',
+        help='Replace the characters found',
+    )
+    add_runner_arguments(parser)
+    return parser
+
+
+def _parse_args(argv: Optional[Sequence[str]]) -> argparse.Namespace:
+    args = _make_parser().parse_args(argv)
+    args.chars = tuple(args.chars or (CONFUSABLES_BY_NAME[name] for name in DEFAULT_NAMES))
+    return args
+
+
+def build_stage(argv: Sequence[str]) -> Callable[[bytes, str], bytes]:
+    """Fix of the contents of a file, for generic-fix-pipeline."""
+    return functools.partial(replace_confusables, confusables=_parse_args(argv).chars)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = _parse_args(argv)
+
+    check = functools.partial(check_file, confusables=args.chars, fix=args.fix)
+    return run_per_file(check, args.filenames, args, cacheable=not args.fix)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
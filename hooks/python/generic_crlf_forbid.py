@@ -2,25 +2,28 @@ from __future__ import print_function
 import argparse
 import sys
 
+from python.util import add_runner_arguments
+from python.util import read_bytes
+from python.util import run_per_file
+
 
 def contains_crlf(filename):
-    with open(filename, mode='rb') as file_checked:
-        for line in file_checked.readlines():
-            if line.endswith(b'\r\n'):
-                return True
-    return False
+    return b'\r\n' in read_bytes(filename)
+
+
+def check_file(filename):
+    if contains_crlf(filename):
+        print('CRLF end-lines detected in file: {}'.format(filename))
+        return 1
+    return 0
 
 
 def main(argv=None):
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*', help='filenames to check')
+    add_runner_arguments(parser)
     args = parser.parse_args(argv)
-    files_with_crlf = filter(contains_crlf, args.filenames)
-    return_code = 0
-    for file_with_crlf in files_with_crlf:
-        print('CRLF end-lines detected in file: {}'.format(file_with_crlf))
-        return_code = 1
-    return return_code
+    return run_per_file(check_file, args.filenames, args)
 
 
 if __name__ == '__main__':
@@ -1,33 +1,41 @@
 import argparse
 import sys
 
+from python.util import add_runner_arguments
+from python.util import read_bytes
+from python.util import run_per_file
+from python.util import write_bytes
 
-def contains_crlf(filename):
-    with open(filename, mode='rb') as file_checked:
-        for line in file_checked.readlines():
-            if line.endswith(b'\r\n'):
-                return True
-    return False
 
+def remove_crlf(contents, filename=''):  # pylint: disable=unused-argument
+    return contents.replace(b'\r\n', b'\n')
 
-def removes_crlf_in_file(filename):
-    with open(filename, mode='rb') as file_processed:
-        lines = file_processed.readlines()
-    lines = [line.replace(b'\r\n', b'\n') for line in lines]
-    with open(filename, mode='wb') as file_processed:
-        for line in lines:
-            file_processed.write(line)
 
+def fix_file(filename):
+    contents = read_bytes(filename)
+    if b'\r\n' not in contents:
+        return 0
+    print('Removing CRLF end-lines in: {}'.format(filename))
+    write_bytes(filename, remove_crlf(contents))
+    return 1
 
-def main(argv=None):
+
+def _make_parser():
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*', help='filenames to check')
-    args = parser.parse_args(argv)
-    files_with_crlf = list(filter(contains_crlf, args.filenames))
-    for file_with_crlf in files_with_crlf:
-        print('Removing CRLF end-lines in: {}'.format(file_with_crlf))
-        removes_crlf_in_file(file_with_crlf)
-    if files_with_crlf:
+    add_runner_arguments(parser)
+    return parser
+
+
+def build_stage(argv):
+    """Fix of the contents of a file, for generic-fix-pipeline."""
+    _make_parser().parse_args(argv)
+    return remove_crlf
+
+
+def main(argv=None):
+    args = _make_parser().parse_args(argv)
+    if run_per_file(fix_file, args.filenames, args):
         print('')
         print('CRLF end-lines have been successfully removed. Now aborting the commit.')
         print('You can check the changes made. Then simply "git add --update ." and re-commit')
@@ -1,7 +1,28 @@
+"""Forbid files containing a private key.
+
+Files are read in chunks, so the memory used does not depend on their size:
+consecutive chunks overlap by the length of the longest marker, so that a
+marker across two chunks is found.  The search stops at the first marker
+found in a file.
+"""
+from __future__ import annotations
+
 import argparse
+import functools
 import sys
-from typing import Optional
-from typing import Sequence
+
+from python.literal_set import literal_set
+from python.timings import phase
+from python.util import add_runner_arguments
+from python.util import open_bytes
+from python.util import run_per_file
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import IO
+    from typing import Optional
+    from typing import Sequence
+    from typing import Tuple
 
 BLACKLIST = [
     b'BEGIN RSA PRIVATE KEY',
@@ -13,27 +34,83 @@ BLACKLIST = [
     b'BEGIN SSH2 ENCRYPTED PRIVATE KEY',
     b'BEGIN PGP PRIVATE KEY BLOCK',
 ]
+CHUNK_SIZE = 1024 * 1024
 
 
-def main(argv: Optional[Sequence[str]] = None) -> int:
-    parser = argparse.ArgumentParser()
-    parser.add_argument('filenames', nargs='*', help='Filenames to check')
-    args = parser.parse_args(argv)
+def find_key(
+    file_obj: IO[bytes],
+    patterns: Tuple[bytes, ...] = (),
+    max_bytes: int = 0,
+    chunk_size: int = CHUNK_SIZE,
+) -> Optional[Tuple[int, int, bytes]]:
+    """Byte offset, line number and marker of the first private key marker.
 
-    private_key_files = []
+    Only the first `max_bytes` bytes are searched, unless it is 0.
+    """
+    matcher = literal_set(tuple(BLACKLIST) + patterns)
+    overlap = max(map(len, matcher.patterns)) - 1
+    scanned = 0
+    # Offset and line number of the start of `tail`, the end of the previous
+    # chunk which may hold the start of a marker
+    tail = b''
+    offset = 0
+    line = 1
+    while True:
+        size = chunk_size if not max_bytes else min(chunk_size, max_bytes - scanned)
+        block = file_obj.read(size) if size > 0 else b''
+        if not block:
+            return None
+        scanned += len(block)
+        data = tail + block
+        found = matcher.search(data)
+        if found:
+            position, marker = found
+            return offset + position, line + data.count(b'\n', 0, position), marker
+        tail_start = max(0, len(data) - overlap)
+        line += data.count(b'\n', 0, tail_start)
+        offset += tail_start
+        tail = data[tail_start:]
 
-    for filename in args.filenames:
-        with open(filename, 'rb') as file_handler:
-            content = file_handler.read()
-            if any(line in content for line in BLACKLIST):
-                private_key_files.append(filename)
 
-    if private_key_files:
-        for private_key_file in private_key_files:
-            print('Private key found: {}'.format(private_key_file))
+def check_file(filename: str, patterns: Tuple[bytes, ...] = (), max_bytes: int = 0) -> int:
+    with phase('check'), open_bytes(filename) as file_obj:
+        found = find_key(file_obj, patterns, max_bytes)
+    if found:
+        offset, line, marker = found
+        print(
+            'Private key found: {}:{}: "{}" at byte {}'.format(
+                filename, line, marker.decode('UTF-8', 'replace'), offset
+            )
+        )
         return 1
     return 0
 
 
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('filenames', nargs='*', help='Filenames to check')
+    parser.add_argument(
+        '--extra-pattern',
+        dest='extra_patterns',
+        action='append',
+        default=[],
+        metavar='TEXT',
+        help='Also forbid files containing TEXT, e.g. a company key header. Can be repeated.',
+    )
+    parser.add_argument(
+        '--max-scan-bytes',
+        type=int,
+        default=0,
+        metavar='BYTES',
+        help='Only search the first BYTES bytes of each file, 0 for the whole file (default: 0)',
+    )
+    add_runner_arguments(parser)
+    args = parser.parse_args(argv)
+
+    patterns = tuple(pattern.encode() for pattern in args.extra_patterns)
+    check = functools.partial(check_file, patterns=patterns, max_bytes=args.max_scan_bytes)
+    return run_per_file(check, args.filenames, args)
+
+
 if __name__ == '__main__':
     sys.exit(main())
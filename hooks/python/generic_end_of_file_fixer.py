@@ -1,70 +1,113 @@
 import argparse
+import functools
 import os
+from typing import Callable
 from typing import IO
 from typing import Optional
 from typing import Sequence
+from typing import Tuple
 import sys
 
+from python.timings import phase
+from python.util import add_runner_arguments
+from python.util import forget_contents
+from python.util import run_per_file
+
+
+# Bytes read from the end of a file, doubled while it only holds end-lines
+TAIL_BLOCK = 64 * 1024
+
+
+def _fix_tail(tail: bytes, is_whole: bool) -> Optional[Tuple[int, bytes]]:
+    """Bytes of `tail` to keep and bytes to append to it.
+
+    None when `tail` only holds end-lines but is not the whole file: the
+    end-lines may start before it.
+    """
+    body = tail.rstrip(b'\r\n')
+    if not body:
+        # Empty, or all linebreaks: make the file empty
+        return (0, b'') if is_whole else None
+    end_lines = tail[len(body):]
+    if not end_lines:
+        return len(tail), b'\n'
+    # Keep the first end-line only
+    return len(body) + (2 if end_lines.startswith(b'\r\n') else 1), b''
+
+
+def _end_fix(file_obj: IO[bytes], size: int) -> Tuple[int, bytes]:
+    """Size to truncate the file to, and bytes to append to it then."""
+    block_size = TAIL_BLOCK
+    while True:
+        start = max(0, size - block_size)
+        file_obj.seek(start)
+        fix = _fix_tail(file_obj.read(size - start), start == 0)
+        if fix is not None:
+            return start + fix[0], fix[1]
+        block_size *= 2
+
 
 def fix_file(file_obj: IO[bytes]) -> int:
-    # Test for newline at end of file
-    # Empty files will throw IOError here
-    try:
-        file_obj.seek(-1, os.SEEK_END)
-    except OSError:
+    size = file_obj.seek(0, os.SEEK_END)
+    new_size, end = _end_fix(file_obj, size)
+    if new_size == size and not end:
         return 0
-    last_character = file_obj.read(1)
-    # last_character will be '' for an empty file
-    if last_character not in {b'\n', b'\r'} and last_character != b'':
-        # Needs this seek for windows, otherwise IOError
-        file_obj.seek(0, os.SEEK_END)
-        file_obj.write(b'\n')
-        return 1
+    file_obj.seek(new_size)
+    file_obj.truncate()
+    file_obj.write(end)
+    return 1
 
-    while last_character in {b'\n', b'\r'}:
-        # Deal with the beginning of the file
-        if file_obj.tell() == 1:
-            # If we've reached the beginning of the file and it is all
-            # linebreaks then we can make this file empty
-            file_obj.seek(0)
-            file_obj.truncate()
-            return 1
-
-        # Go back two bytes and read a character
-        file_obj.seek(-2, os.SEEK_CUR)
-        last_character = file_obj.read(1)
-
-    # Our current position is at the end of the file just before any amount of
-    # newlines.  If we find extraneous newlines, then backtrack and trim them.
-    position = file_obj.tell()
-    remaining = file_obj.read()
-    for sequence in (b'\n', b'\r\n', b'\r'):
-        if remaining == sequence:
-            return 0
-        if remaining.startswith(sequence):
-            file_obj.seek(position + len(sequence))
-            file_obj.truncate()
-            return 1
-
-    return 0
 
+def fix_contents(contents: bytes, filename: str = '') -> bytes:  # pylint: disable=unused-argument
+    keep, end = _fix_tail(contents, True) or (len(contents), b'')
+    return contents[:keep] + end
 
-def main(argv: Optional[Sequence[str]] = None) -> int:
+
+def _fix_filename(filename: str, check: bool = False) -> int:
+    # Only the end of the file is read, and it is opened for writing only
+    # when it needs a fix
+    with phase('read'), open(filename, 'rb') as file_obj:
+        size = os.fstat(file_obj.fileno()).st_size
+        new_size, end = _end_fix(file_obj, size)
+    if new_size == size and not end:
+        return 0
+    if check:
+        print(f'{filename}: missing or extraneous end-lines at the end of the file')
+        return 1
+    with phase('write'), open(filename, 'rb+') as file_obj:
+        file_obj.truncate(new_size)
+        file_obj.seek(new_size)
+        file_obj.write(end)
+    forget_contents(filename)
+    print(f'Fixing {filename}')
+    return 1
+
+
+def _make_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--check',
+        action='store_true',
+        help='Only report the files to fix, never open them for writing',
+    )
     parser.add_argument('filenames', nargs='*', help='Filenames to fix')
-    args = parser.parse_args(argv)
+    add_runner_arguments(parser)
+    return parser
+
 
-    retv = 0
+def build_stage(argv: Sequence[str]) -> Callable[[bytes, str], bytes]:
+    """Fix of the contents of a file, for generic-fix-pipeline."""
+    parser = _make_parser()
+    if parser.parse_args(argv).check:
+        parser.error('--check cannot be used in a pipeline')
+    return fix_contents
 
-    for filename in args.filenames:
-        # Read as binary so we can read byte-by-byte
-        with open(filename, 'rb+') as file_obj:
-            ret_for_file = fix_file(file_obj)
-            if ret_for_file:
-                print(f'Fixing {filename}')
-            retv |= ret_for_file
 
-    return retv
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = _make_parser().parse_args(argv)
+
+    fix = functools.partial(_fix_filename, check=args.check)
+    return run_per_file(fix, args.filenames, args)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,125 @@
+"""Apply several fixers to each file in memory, and write it at most once.
+
+Every stage is given as the console script name of a fixer, followed by its
+own arguments, e.g.::
+
+    generic-fix-pipeline --stage generic-trailing-whitespace-fixer \\
+                         --stage 'python-fix-encoding-pragma --remove --pch-files=\\.py$' \\
+                         --stage generic-end-of-file-fixer \\
+                         -- file1.py file2.md
+
+The stages run in order on the contents of each file, each one on the
+output of the previous one.  The file is replaced atomically, once, when the
+final contents differ from the original ones.  `--pch-files` / `--pch-exclude`
+restrict the files a stage applies to, as with pch-run.
+"""
+import argparse
+import functools
+import sys
+from typing import Callable
+from typing import NamedTuple
+from typing import Optional
+from typing import Pattern
+from typing import Sequence
+from typing import Tuple
+
+from python.pch_run import import_hook
+from python.pch_run import is_selected
+from python.pch_run import split_spec
+from python.timings import phase
+from python.util import add_runner_arguments
+from python.util import read_bytes
+from python.util import replace_bytes
+from python.util import run_per_file
+
+FIXERS = (
+    'generic-confusables',
+    'generic-crlf-remove',
+    'generic-end-of-file-fixer',
+    'generic-mixed-line-ending',
+    'generic-tabs-remove',
+    'generic-trailing-whitespace-fixer',
+    'json-pretty-format',
+    'python-double-quote-string-fixer',
+    'python-fix-encoding-pragma',
+    'python-requirements-txt-fixer',
+)
+
+
+class Stage(NamedTuple):
+    hook_id: str
+    # (contents, filename) -> fixed contents, ValueError if it cannot fix them
+    fix: Callable[[bytes, str], bytes]
+    files: Optional[Pattern[str]]
+    exclude: Optional[Pattern[str]]
+
+
+def parse_stage(spec: str) -> Stage:
+    hook_id, args, files, exclude = split_spec(spec)
+    if hook_id not in FIXERS:
+        raise ValueError('{}: not one of {}'.format(hook_id, ', '.join(FIXERS)))
+    build_stage = import_hook(hook_id, 'build_stage')
+    try:
+        fix = build_stage(args)
+    except SystemExit as exc:  # argparse errors, already printed
+        raise ValueError('{}: invalid arguments {}'.format(hook_id, args)) from exc
+    return Stage(hook_id, fix, files, exclude)
+
+
+def fix_file(filename: str, stages: Tuple[Stage, ...]) -> int:
+    original = contents = read_bytes(filename)
+    for stage in stages:
+        if not is_selected(filename, stage.files, stage.exclude):
+            continue
+        try:
+            with phase(stage.hook_id):
+                fixed = stage.fix(contents, filename)
+        except (ValueError, SyntaxError) as exc:
+            # Invalid JSON, undecodable or untokenizable file...: leave it untouched
+            print('{}: {}: cannot fix ({})'.format(filename, stage.hook_id, exc))
+            return 1
+        if fixed != contents:
+            print('{}: fixed by {}'.format(filename, stage.hook_id))
+            contents = fixed
+
+    if contents == original:
+        return 0
+    replace_bytes(filename, contents)
+    return 1
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        '--stage',
+        dest='stages',
+        action='append',
+        default=[],
+        metavar='"FIXER [ARGS...]"',
+        help='Console script name of a fixer, with its arguments. Can be repeated.',
+    )
+    parser.add_argument('filenames', nargs='*', help='Filenames to fix')
+    add_runner_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if not args.stages:
+        parser.error('at least one --stage is required')
+    stages = []
+    for spec in args.stages:
+        try:
+            stages.append(parse_stage(spec))
+        except ValueError as exc:
+            parser.error(str(exc))
+
+    return run_per_file(
+        functools.partial(fix_file, stages=tuple(stages)),
+        args.filenames,
+        args,
+    )
+
+
+if __name__ == '__main__':
+    sys.exit(main())
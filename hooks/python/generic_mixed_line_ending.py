@@ -0,0 +1,145 @@
+"""Forbid files mixing LF, CRLF and CR end-lines, or convert them to one style.
+
+End-lines are counted with bytes.count() over whole buffers, never line by
+line.  Without a fix, files are read in chunks, so that the memory used does
+not depend on their size.
+"""
+import argparse
+import collections
+import functools
+import sys
+from typing import Callable
+from typing import Counter
+from typing import Dict
+from typing import IO
+from typing import Optional
+from typing import Sequence
+
+from python.timings import phase
+from python.util import add_runner_arguments
+from python.util import count_line_endings
+from python.util import open_bytes
+from python.util import read_bytes
+from python.util import replace_bytes
+from python.util import run_per_file
+
+STYLES = {'lf': b'\n', 'crlf': b'\r\n', 'cr': b'\r'}
+STYLE_NAMES = {ending: name.upper() for name, ending in STYLES.items()}
+FIXES = ('auto', 'no') + tuple(STYLES)
+CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def count_file_line_endings(file_obj: IO[bytes], chunk_size: int = CHUNK_SIZE) -> Counter[bytes]:
+    counts: Counter[bytes] = collections.Counter()
+    previous = b''
+    while True:
+        block = file_obj.read(chunk_size)
+        if not block:
+            return counts
+        counts.update(count_line_endings(block))
+        if previous.endswith(b'\r') and block.startswith(b'\n'):
+            # A CRLF across two chunks was counted as a CR and a LF
+            counts[b'\r'] -= 1
+            counts[b'\n'] -= 1
+            counts[b'\r\n'] += 1
+        previous = block
+
+
+def majority(counts: Dict[bytes, int]) -> bytes:
+    """Most frequent end-line, LF first, then CRLF, on ties."""
+    return max((b'\n', b'\r\n', b'\r'), key=lambda ending: (counts[ending], ending == b'\n'))
+
+
+def describe(counts: Dict[bytes, int]) -> str:
+    return ', '.join(
+        '{}: {}'.format(STYLE_NAMES[ending], count) for ending, count in counts.items()
+    )
+
+
+def convert(contents: bytes, ending: bytes) -> bytes:
+    lf_only = contents.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    return lf_only if ending == b'\n' else lf_only.replace(b'\n', ending)
+
+
+def target_ending(counts: Dict[bytes, int], fix: str) -> Optional[bytes]:
+    """End-line to convert a file to, None when it needs no conversion."""
+    found = [ending for ending, count in counts.items() if count]
+    if fix == 'auto':
+        return majority(counts) if len(found) > 1 else None
+    ending = STYLES[fix]
+    return ending if set(found) - {ending} else None
+
+
+def fix_contents(
+    contents: bytes,
+    filename: str = '',  # pylint: disable=unused-argument
+    fix: str = 'auto',
+) -> bytes:
+    ending = target_ending(count_line_endings(contents), fix)
+    return contents if ending is None else convert(contents, ending)
+
+
+def check_file(filename: str, fix: str) -> int:
+    if fix == 'no':
+        with phase('check'), open_bytes(filename) as file_obj:
+            counts: Dict[bytes, int] = count_file_line_endings(file_obj)
+        if sum(1 for count in counts.values() if count) > 1:
+            print(
+                '{}: mixed end-lines ({}), mostly {}'.format(
+                    filename, describe(counts), STYLE_NAMES[majority(counts)]
+                )
+            )
+            return 1
+        return 0
+
+    contents = read_bytes(filename)
+    with phase('check'):
+        counts = count_line_endings(contents)
+        ending = target_ending(counts, fix)
+    if ending is None:
+        return 0
+    replace_bytes(filename, convert(contents, ending))
+    print(
+        '{}: end-lines ({}) converted to {}'.format(
+            filename, describe(counts), STYLE_NAMES[ending]
+        )
+    )
+    return 1
+
+
+def _make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('filenames', nargs='*', help='Filenames to check')
+    parser.add_argument(
+        '--fix',
+        choices=FIXES,
+        default='auto',
+        help=(
+            'Convert mixed files to their most frequent end-line (auto), only report them (no), '
+            'or convert every file to the given end-line (default: %(default)s)'
+        ),
+    )
+    add_runner_arguments(parser)
+    return parser
+
+
+def build_stage(argv: Sequence[str]) -> Callable[[bytes, str], bytes]:
+    """Fix of the contents of a file, for generic-fix-pipeline."""
+    parser = _make_parser()
+    args = parser.parse_args(argv)
+    if args.fix == 'no':
+        parser.error('--fix=no cannot be used in a pipeline')
+    return functools.partial(fix_contents, fix=args.fix)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = _make_parser().parse_args(argv)
+
+    # Not cacheable: the cache key would need the whole file in memory, which
+    # --fix=no avoids, and fixing files is not a check
+    check = functools.partial(check_file, fix=args.fix)
+    return run_per_file(check, args.filenames, args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""Run the byte-level "forbid" checks in a single pass over each file.
+
+One regex finds CRLF end-lines, tabs, non-breaking spaces, en dashes, merge
+conflict strings, private keys and non-permanent vcs links; the
+byte-order marker is looked for at the start of the file only.  Each finding
+is reported with its line number; a rule which reached `--max-findings` in a
+file is dropped from the regex for the rest of that file.
+"""
+from __future__ import annotations
+
+import argparse
+import collections
+import functools
+import re
+import sys
+
+from python.generic_check_vcs_permalinks import DEFAULT_BRANCHES
+from python.generic_check_vcs_permalinks import DEFAULT_HOSTS
+from python.generic_check_vcs_permalinks import non_permalink_pattern
+from python.generic_detect_private_key import BLACKLIST
+from python.git_check_merge_conflict import CONFLICT_PATTERNS
+from python.git_check_merge_conflict import is_in_merge
+from python.literal_set import literal_set
+from python.timings import phase
+from python.util import add_runner_arguments
+from python.util import read_bytes
+from python.util import run_per_file
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import AbstractSet
+    from typing import Dict
+    from typing import FrozenSet
+    from typing import Iterator
+    from typing import Optional
+    from typing import Pattern
+    from typing import Sequence
+    from typing import Tuple
+
+
+# patterns: regexes which must start with a (possibly escaped) literal byte and
+# must not cross lines
+# line_start, file_start: only matched at the start of a line, or only at the
+# start of the file
+Rule = collections.namedtuple(
+    'Rule',
+    ('name', 'message', 'patterns', 'line_start', 'file_start'),
+    defaults=(False, False),
+)
+
+
+RULES = (
+    Rule('bom', 'byte-order marker', (b'\xef\xbb\xbf', ), file_start=True),
+    Rule('crlf', 'CRLF end-line', (b'\r\n', )),
+    Rule('tabs', 'tab character', (b'\t', )),
+    Rule('nbsp', 'non-breaking space U+00A0', (b'\xc2\xa0', )),
+    Rule('en-dash', 'en dash U+2013', (b'\xe2\x80\x93', )),
+    Rule(
+        'merge-conflict',
+        'merge conflict string "{match}"',
+        CONFLICT_PATTERNS,
+        line_start=True,
+    ),
+    Rule('private-key', 'private key "{match}"', literal_set(tuple(BLACKLIST)).branches),
+    Rule(
+        'vcs-permalink',
+        'non-permanent vcs link, link to a commit instead of a branch',
+        (non_permalink_pattern(DEFAULT_HOSTS, DEFAULT_BRANCHES), ),
+    ),
+)
+RULES_BY_NAME = {rule.name: rule for rule in RULES}
+
+
+@functools.lru_cache(maxsize=None)
+def scanner(rule_names: FrozenSet[str]) -> Tuple[Pattern[bytes], Dict[str, Rule]]:
+    """Regex matching the rules anywhere in a file, and the rule of each group.
+
+    Every alternative consumes its first byte and looks ahead for the rest,
+    so that the regex engine can skip to the next candidate byte without
+    trying each alternative at each position, and so that a finding never
+    hides another one starting inside it.  The rest of the match is captured
+    by a group named after the rule.
+    """
+    alternatives = []
+    groups = {}
+    for rule in RULES:
+        if rule.name not in rule_names or rule.file_start:
+            continue
+        for pattern in rule.patterns:
+            if rule.line_start:
+                pattern = b'\n' + pattern
+            head_length = 2 if pattern.startswith(b'\\') else 1
+            group = 'g{}'.format(len(groups))
+            groups[group] = rule
+            alternatives.append(
+                b'%s(?=(?P<%s>%s))' %
+                (pattern[:head_length], group.encode(), pattern[head_length:])
+            )
+    return re.compile(b'|'.join(alternatives)), groups
+
+
+def _start_findings(contents: bytes, rule_names: AbstractSet[str]) -> Iterator[Tuple[Rule, bytes]]:
+    for rule in RULES:
+        if rule.name in rule_names and (rule.line_start or rule.file_start):
+            for pattern in rule.patterns:
+                match = re.match(pattern, contents)
+                if match:
+                    yield rule, match.group()
+                    break
+
+
+def scan(contents: bytes, rule_names: AbstractSet[str],
+         max_findings: int = 0) -> Iterator[Tuple[Rule, int, bytes]]:
+    """Rule, line number and matched bytes of each finding, in file order.
+
+    A rule is reported at most once per line.  With `max_findings`, a rule
+    stops being searched after that many findings.
+    """
+    counts: Dict[str, int] = collections.Counter()
+    last_lines: Dict[str, int] = {}
+    for rule, text in _start_findings(contents, rule_names):
+        last_lines[rule.name] = counts[rule.name] = 1
+        yield rule, 1, text
+    active = frozenset(
+        name for name in rule_names if not RULES_BY_NAME[name].file_start and
+        (not max_findings or counts[name] < max_findings)
+    )
+    pos = line_pos = 0
+    line = 1
+    while active:
+        regex, groups = scanner(active)
+        for match in regex.finditer(contents, pos):
+            rule = groups[match.lastgroup or '']
+            # After the newline which starts a line_start match
+            line += contents.count(b'\n', line_pos, match.end())
+            line_pos = match.end()
+            if last_lines.get(rule.name) == line:
+                continue
+            last_lines[rule.name] = line
+            text = match.group(match.lastgroup or 0)
+            yield rule, line, text if rule.line_start else match.group() + text
+            counts[rule.name] += 1
+            if max_findings and counts[rule.name] == max_findings:
+                active -= {rule.name}
+                pos = match.end()
+                break
+        else:
+            return
+
+
+def check_file(filename: str, rule_names: FrozenSet[str], max_findings: int) -> int:
+    contents = read_bytes(filename)
+    retv = 0
+    counts: Dict[str, int] = collections.Counter()
+    stopped = set()
+    with phase('check'):
+        # One more finding than reported tells whether any was left out
+        for rule, line, match in scan(contents, rule_names, max_findings and max_findings + 1):
+            if max_findings and counts[rule.name] == max_findings:
+                stopped.add(rule.name)
+                continue
+            text = match.decode('UTF-8', 'replace').rstrip('\n')
+            print(f'{filename}:{line}: {rule.name}: {rule.message.format(match=text)}')
+            counts[rule.name] += 1
+            retv = 1
+    for name in sorted(stopped):
+        print(f'{filename}: {name}: stopped after {max_findings} findings')
+    return retv
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('filenames', nargs='*', help='Filenames to check')
+    parser.add_argument(
+        '--skip',
+        action='append',
+        default=[],
+        choices=sorted(RULES_BY_NAME),
+        metavar='RULE',
+        help='Rule not to check, can be repeated ({})'.format(', '.join(RULES_BY_NAME)),
+    )
+    parser.add_argument(
+        '--assume-in-merge',
+        action='store_true',
+        help='Look for merge conflict strings even outside of a merge',
+    )
+    parser.add_argument(
+        '--max-findings',
+        type=int,
+        default=10,
+        metavar='N',
+        help='Findings reported per rule and per file, 0 for all (default: 10)',
+    )
+    add_runner_arguments(parser)
+    args = parser.parse_args(argv)
+
+    # Also part of the result cache key: a file which passed outside of a
+    # merge must be checked again for conflict strings during a merge
+    args.assume_in_merge = args.assume_in_merge or is_in_merge()
+    rule_names = set(RULES_BY_NAME) - set(args.skip)
+    if not args.assume_in_merge:
+        rule_names.discard('merge-conflict')
+    if not rule_names:
+        return 0
+
+    check = functools.partial(
+        check_file,
+        rule_names=frozenset(rule_names),
+        max_findings=args.max_findings,
+    )
+    return run_per_file(check, args.filenames, args, cacheable=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,23 +1,39 @@
 from __future__ import print_function
 import argparse
+import functools
 import sys
 
+from python.util import add_runner_arguments
+from python.util import read_bytes
+from python.util import run_per_file
+from python.util import write_bytes
 
-def contains_tabs(filename):
-    with open(filename, mode='rb') as file_checked:
-        return b'\t' in file_checked.read()
 
+def replace_tabs(contents, filename='', whitespaces_count=4, tab_stops=False):
+    # pylint: disable=unused-argument
+    if b'\t' not in contents:
+        return contents
+    if tab_stops:
+        # Columns are counted in characters, undecodable bytes count as one
+        text = contents.decode('UTF-8', 'surrogateescape')
+        return text.expandtabs(whitespaces_count).encode('UTF-8', 'surrogateescape')
+    return contents.replace(b'\t', b' ' * whitespaces_count)
 
-def removes_tabs_in_file(filename, whitespaces_count):
-    with open(filename, mode='rb') as file_processed:
-        lines = file_processed.readlines()
-    lines = [line.replace(b'\t', b' ' * whitespaces_count) for line in lines]
-    with open(filename, mode='wb') as file_processed:
-        for line in lines:
-            file_processed.write(line)
 
+def fix_file(filename, whitespaces_count, tab_stops=False):
+    contents = read_bytes(filename)
+    if b'\t' not in contents:
+        return 0
+    if tab_stops:
+        print('Expanding tabs in: {} to tab stops every {} columns'.format(
+            filename, whitespaces_count))
+    else:
+        print('Substituting tabs in: {} by {} whitespaces'.format(filename, whitespaces_count))
+    write_bytes(filename, replace_tabs(contents, filename, whitespaces_count, tab_stops))
+    return 1
 
-def main(argv=None):
+
+def _make_parser():
     parser = argparse.ArgumentParser()
     parser.add_argument(
         '--whitespaces-count',
@@ -25,17 +41,34 @@ def main(argv=None):
         required=True,
         help='number of whitespaces to substitute tabs with'
     )
+    parser.add_argument(
+        '--tab-stops',
+        action='store_true',
+        help='expand tabs to the next multiple of --whitespaces-count columns'
+    )
     parser.add_argument('filenames', nargs='*', help='filenames to check')
-    args = parser.parse_args(argv)
-    files_with_tabs = list(filter(contains_tabs, args.filenames))
-    for file_with_tabs in files_with_tabs:
-        print(
-            'Substituting tabs in: {} by {} whitespaces'.format(
-                file_with_tabs, args.whitespaces_count
-            )
-        )
-        removes_tabs_in_file(file_with_tabs, args.whitespaces_count)
-    if files_with_tabs:
+    add_runner_arguments(parser)
+    return parser
+
+
+def build_stage(argv):
+    """Fix of the contents of a file, for generic-fix-pipeline."""
+    args = _make_parser().parse_args(argv)
+    return functools.partial(
+        replace_tabs,
+        whitespaces_count=args.whitespaces_count,
+        tab_stops=args.tab_stops,
+    )
+
+
+def main(argv=None):
+    args = _make_parser().parse_args(argv)
+    fix = functools.partial(
+        fix_file,
+        whitespaces_count=args.whitespaces_count,
+        tab_stops=args.tab_stops,
+    )
+    if run_per_file(fix, args.filenames, args):
         print('')
         print('Tabs have been successfully removed. Now aborting the commit.')
         print('You can check the changes made. Then simply "git add --update ." and re-commit')
@@ -1,38 +1,154 @@
 import argparse
+import contextlib
+import functools
 import os
+import re
 import sys
+from typing import Callable
+from typing import IO
+from typing import List
+from typing import Match
 from typing import Optional
+from typing import Pattern
 from typing import Sequence
 
+from python.timings import phase
+from python.util import add_runner_arguments
+from python.util import atomic_writer
+from python.util import read_bytes
+from python.util import run_per_file
+from python.util import write_bytes
 
-def _fix_file(filename: str, is_markdown: bool, chars: Optional[bytes]) -> bool:
-    with open(filename, mode='rb') as file_processed:
-        lines = file_processed.readlines()
-    newlines = [_process_line(line, is_markdown, chars) for line in lines]
-    if newlines != lines:
-        with open(filename, mode='wb') as file_processed:
-            for line in newlines:
-                file_processed.write(line)
+# Files larger than this are fixed chunk by chunk
+STREAM_THRESHOLD = 16 * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+# bytes.rstrip() strips these by default, end-lines apart
+WHITESPACE = b' \t\r\x0b\x0c'
+
+
+@functools.lru_cache(maxsize=None)
+def _trailing_regex(is_markdown: bool, chars: Optional[bytes]) -> Pattern[bytes]:
+    """Regex matching the trailing characters to strip and the end-line of a line.
+
+    The stripped characters never include the CR of a CRLF end-line.  In
+    markdown files, a line ending with two spaces also matches the
+    characters stripped before them.
+    """
+    stripped = WHITESPACE if chars is None else chars.replace(b'\n', b'')
+    char_class = b'[' + re.escape(stripped) + b']' if stripped else b'(?!)'
+    trailing = char_class + b'+?'
+    if is_markdown:
+        trailing = b'(?:' + trailing + b'|' + char_class + b'*?  )'
+    return re.compile(b'(' + trailing + b')(\r\n|(?<!\r)\n|\\Z)')
+
+
+def _fix_lines(contents: bytes, is_markdown: bool, chars: Optional[bytes]) -> Optional[bytes]:
+    """Fixed contents, None when there is nothing to fix."""
+    def strip(match: Match[bytes]) -> bytes:
+        trailing, eol = match.groups()
+        if not is_markdown:
+            return eol
+        # preserve trailing two-space for non-blank lines in markdown files
+        line_start = contents.rfind(b'\n', 0, match.start()) + 1
+        if trailing.endswith(b'  ') and not contents[line_start:match.end(1)].isspace():
+            return b'  ' + eol
+        return trailing.rstrip(chars) + eol
+
+    with phase('check'):
+        fixed = _trailing_regex(is_markdown, chars).sub(strip, contents)
+    return None if fixed == contents else fixed
+
+
+def _fix_file(
+    filename: str,
+    is_markdown: bool,
+    chars: Optional[bytes],
+    stream_threshold: int = STREAM_THRESHOLD,
+) -> bool:
+    if os.path.getsize(filename) > stream_threshold:
+        return _stream_fix_file(filename, is_markdown, chars)
+    fixed = _fix_lines(read_bytes(filename), is_markdown, chars)
+    if fixed is not None:
+        write_bytes(filename, fixed)
         return True
     return False
 
 
-def _process_line(line: bytes, is_markdown: bool, chars: Optional[bytes]) -> bytes:
-    if line[-2:] == b'\r\n':
-        eol = b'\r\n'
-        line = line[:-2]
-    elif line[-1:] == b'\n':
-        eol = b'\n'
-        line = line[:-1]
-    else:
-        eol = b''
-    # preserve trailing two-space for non-blank lines in markdown files
-    if is_markdown and (not line.isspace()) and line.endswith(b'  '):
-        return line[:-2].rstrip(chars) + b'  ' + eol
-    return line.rstrip(chars) + eol
+def _stream_fix_file(
+    filename: str,
+    is_markdown: bool,
+    chars: Optional[bytes],
+    chunk_size: int = CHUNK_SIZE,
+) -> bool:
+    """Fix a file in chunks of whole lines, in memory bounded by `chunk_size`.
 
+    Nothing is written while the chunks are unchanged.  At the first change,
+    the lines already read are copied to a temporary file, which receives
+    the rest of the fixed file and then replaces it atomically.  A line
+    longer than `chunk_size` is still read whole.
+    """
+    with contextlib.ExitStack() as stack:
+        source = stack.enter_context(open(filename, 'rb'))
+        output: Optional[IO[bytes]] = None
+        offset = 0
+        pending = b''
+        while True:
+            block = source.read(chunk_size)
+            data = pending + block
+            end = data.rfind(b'\n') + 1 if block else len(data)
+            chunk, pending = data[:end], data[end:]
+            fixed = _fix_lines(chunk, is_markdown, chars)
+            if fixed is not None and output is None:
+                output = stack.enter_context(atomic_writer(filename))
+                _copy_head(filename, offset, output, chunk_size)
+            if output is not None:
+                output.write(chunk if fixed is None else fixed)
+            offset += len(chunk)
+            if not block:
+                return output is not None
 
-def main(argv: Optional[Sequence[str]] = None) -> int:
+
+def _copy_head(filename: str, size: int, output: IO[bytes], chunk_size: int) -> None:
+    with open(filename, 'rb') as source:
+        while size > 0:
+            block = source.read(min(size, chunk_size))
+            if not block:
+                break
+            output.write(block)
+            size -= len(block)
+
+
+def _is_markdown(filename: str, all_markdown: bool, md_exts: List[str]) -> bool:
+    _, extension = os.path.splitext(filename.lower())
+    return all_markdown or extension in md_exts
+
+
+def fix_contents(
+    contents: bytes,
+    filename: str,
+    all_markdown: bool,
+    md_exts: List[str],
+    chars: Optional[bytes],
+) -> bytes:
+    fixed = _fix_lines(contents, _is_markdown(filename, all_markdown, md_exts), chars)
+    return contents if fixed is None else fixed
+
+
+def _fix_filename(
+    filename: str,
+    all_markdown: bool,
+    md_exts: List[str],
+    chars: Optional[bytes],
+    stream_threshold: int = STREAM_THRESHOLD,
+) -> int:
+    mkdown = _is_markdown(filename, all_markdown, md_exts)
+    if _fix_file(filename, mkdown, chars, stream_threshold):
+        print(f'Fixing {filename}')
+        return 1
+    return 0
+
+
+def _parse_args(argv: Optional[Sequence[str]]) -> argparse.Namespace:
     parser = argparse.ArgumentParser()
     parser.add_argument(
         '--no-markdown-linebreak-ext',
@@ -56,12 +172,20 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
             'Defaults to all whitespace characters.'
         ),
     )
+    parser.add_argument(
+        '--stream-threshold',
+        type=int,
+        default=STREAM_THRESHOLD,
+        metavar='BYTES',
+        help=(
+            'Files larger than this are fixed chunk by chunk, in bounded memory.  '
+            'default: %(default)s'
+        ),
+    )
     parser.add_argument('filenames', nargs='*', help='Filenames to fix')
+    add_runner_arguments(parser)
     args = parser.parse_args(argv)
 
-    if args.no_markdown_linebreak_ext:
-        print('--no-markdown-linebreak-ext now does nothing!')
-
     md_args = args.markdown_linebreak_ext
     if '' in md_args:
         parser.error('--markdown-linebreak-ext requires a non-empty argument')
@@ -77,15 +201,37 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
                 f'{ext!r} (has . / \\ :)\n'
                 f"  (probably filename; use '--markdown-linebreak-ext=EXT')",
             )
-    chars = None if args.chars is None else args.chars.encode()
-    return_code = 0
-    for filename in args.filenames:
-        _, extension = os.path.splitext(filename.lower())
-        mkdown = all_markdown or extension in md_exts
-        if _fix_file(filename, mkdown, chars):
-            print(f'Fixing {filename}')
-            return_code = 1
-    return return_code
+    args.all_markdown = all_markdown
+    args.md_exts = md_exts
+    args.chars = None if args.chars is None else args.chars.encode()
+    return args
+
+
+def build_stage(argv: Sequence[str]) -> Callable[[bytes, str], bytes]:
+    """Fix of the contents of a file, for generic-fix-pipeline."""
+    args = _parse_args(argv)
+    return functools.partial(
+        fix_contents,
+        all_markdown=args.all_markdown,
+        md_exts=args.md_exts,
+        chars=args.chars,
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = _parse_args(argv)
+
+    if args.no_markdown_linebreak_ext:
+        print('--no-markdown-linebreak-ext now does nothing!')
+
+    fix = functools.partial(
+        _fix_filename,
+        all_markdown=args.all_markdown,
+        md_exts=args.md_exts,
+        chars=args.chars,
+        stream_threshold=args.stream_threshold,
+    )
+    return run_per_file(fix, args.filenames, args)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,89 @@
+"""Forbid whitespace errors and conflict markers in the staged changes.
+
+The errors are the ones of `git diff --check`, on the added lines only, as
+configured by `core.whitespace` and by the `whitespace` attribute in
+.gitattributes.  Only the staged changes of the given files (of all the
+files without arguments) are checked; `--all` checks the whole content of
+the tracked files in the work tree instead.
+"""
+import argparse
+import re
+import sys
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Sequence
+
+from python.timings import timed
+from python.util import CalledProcessError
+from python.util import cmd_output
+from python.util import EMPTY_TREE
+from python.util import head_tree
+
+# `git diff --check` reports `path:line: message`, whitespace errors followed
+# by the offending line prefixed with `+`
+_REPORT = re.compile(r'(?P<filename>.+):(?P<line>\d+): (?P<message>.+?)\.?')
+# The reports which are not followed by the offending line
+_WITHOUT_LINE = frozenset(('leftover conflict marker', 'new blank line at EOF'))
+
+
+class WhitespaceError(NamedTuple):
+    filename: str
+    line: int
+    message: str
+
+
+def check_output(filenames: Sequence[str], all_files: bool = False) -> str:
+    cmd = ['git', '-c', 'core.quotePath=false', '--literal-pathspecs', 'diff-index', '--check']
+    if all_files:
+        cmd += [EMPTY_TREE, '--']
+    else:
+        cmd += ['--cached', head_tree(), '--', *filenames]
+    try:
+        return cmd_output(*cmd)
+    except CalledProcessError as error:
+        _, _, returncode, stdout, _ = error.args
+        if returncode != 2:  # 2 means that errors were found
+            raise
+        return stdout
+
+
+def whitespace_errors(filenames: Sequence[str], all_files: bool = False) -> List[WhitespaceError]:
+    errors = []
+    reports = iter(check_output(filenames, all_files).splitlines())
+    for report in reports:
+        match = _REPORT.fullmatch(report)
+        if match is None:
+            continue
+        filename, line, message = match.group('filename', 'line', 'message')
+        errors.append(WhitespaceError(filename, int(line), message))
+        # Told apart by position, as a file name may start with `+` too
+        if message not in _WITHOUT_LINE:
+            next(reports, None)
+    return errors
+
+
+@timed
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        'filenames',
+        nargs='*',
+        help='Files whose staged changes are checked (default: all the staged changes)',
+    )
+    parser.add_argument(
+        '--all',
+        dest='all_files',
+        action='store_true',
+        help='Check the whole content of the tracked files in the work tree',
+    )
+    args = parser.parse_args(argv)
+
+    errors = whitespace_errors(args.filenames, args.all_files)
+    for error in errors:
+        print(f'{error.filename}:{error.line}: {error.message}')
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,40 +1,91 @@
 import argparse
-import json
 import math
 import os
 import sys
+from typing import List
+from typing import NamedTuple
 from typing import Optional
 from typing import Sequence
 from typing import Set
 
-from python.util import added_files
-from python.util import CalledProcessError
+from python.timings import timed
 from python.util import cmd_output
+from python.util import git_cat_file
+from python.util import head_tree
 
+SUBMODULE_MODE = '160000'
 
-def lfs_files() -> Set[str]:
-    try:
-        # Introduced in git-lfs 2.2.0, first working in 2.2.1
-        lfs_ret = cmd_output('git', 'lfs', 'status', '--json')
-    except CalledProcessError:  # pragma: no cover (with git-lfs)
-        lfs_ret = '{"files":{}}'
 
-    return set(json.loads(lfs_ret)['files'])
+class StagedChange(NamedTuple):
+    path: str
+    status: str
+    old_oid: str
+    new_oid: str
+
+
+def staged_changes() -> List[StagedChange]:
+    """Added and modified files of the index, from a single `git diff-index`."""
+    cmd = ('git', 'diff-index', '--cached', '--raw', '-z', '--no-renames', '--no-abbrev')
+    fields = cmd_output(*cmd, head_tree()).split('\0')
+    changes = []
+    for info, path in zip(fields[0:-1:2], fields[1::2]):
+        old_mode, new_mode, old_oid, new_oid, status = info.lstrip(':').split(' ')
+        # Submodules are commits of another repository
+        if status in {'A', 'M', 'T'} and new_mode != SUBMODULE_MODE:
+            old_oid = old_oid if old_mode not in {'000000', SUBMODULE_MODE} else ''
+            changes.append(StagedChange(path, status, old_oid, new_oid))
+    return changes
+
+
+def lfs_files(filenames: Sequence[str]) -> Set[str]:
+    """Files whose content goes through the git-lfs filter, per .gitattributes."""
+    if not filenames:
+        return set()
+    fields = cmd_output('git', 'check-attr', '-z', 'filter', '--', *filenames).split('\0')
+    return {
+        path for path, _, value in zip(fields[0::3], fields[1::3], fields[2::3])
+        if value == 'lfs'
+    }
+
+
+def _kbytes(size: int) -> int:
+    return int(math.ceil(size / 1024))
 
 
 def find_large_added_files(filenames: Sequence[str], maxkb: int) -> int:
-    # Find all added files that are also in the list of files pre-commit tells
-    # us about
+    # Added files, and modified files which grew past the limit, among the
+    # files pre-commit tells us about
+    selected = set(filenames)
+    changes = [change for change in staged_changes() if change.path in selected]
+    # Size of the staged blobs, i.e. of what is about to be committed, and of
+    # the committed ones they replace
+    cat_file = git_cat_file()
+    new_infos = cat_file.infos(change.new_oid for change in changes)
+    old_oids = [change.old_oid for change in changes if change.old_oid]
+    old_sizes = {
+        oid: info.size for oid, info in zip(old_oids, cat_file.infos(old_oids)) if info is not None
+    }
+
+    too_large = {}
+    for change, info in zip(changes, new_infos):
+        size = info.size if info is not None else os.stat(change.path).st_size
+        if _kbytes(size) <= maxkb:
+            continue
+        if _kbytes(old_sizes.get(change.old_oid, 0)) > maxkb:
+            continue  # already over the limit before
+        too_large[change.path] = _kbytes(size)
+
     retv = 0
-    for filename in (added_files() & set(filenames)) - lfs_files():
-        kbytes = int(math.ceil(os.stat(filename).st_size / 1024))
-        if kbytes > maxkb:
+    lfs = lfs_files(sorted(too_large))
+    for filename, kbytes in sorted(too_large.items()):
+        if filename not in lfs:
             print('{} ({} KB) exceeds {} KB.'.format(filename, kbytes, maxkb))
             retv = 1
 
     return retv
 
 
+@timed
 def main(argv: Optional[Sequence[str]] = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument(
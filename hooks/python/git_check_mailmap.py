@@ -14,32 +14,145 @@ The above example can be fixed by adding these two lines to .mailmap file:
 
 See git-shortlog(1) for more details.
 """
-from collections import defaultdict
-from subprocess import check_output
+import argparse
+import json
+import os
 import sys
 
+from python.timings import timed
+from python.util import blob_sha
+from python.util import CalledProcessError
+from python.util import cmd_output
+from python.util import git_dir
 
-def get_git_mail_map():
-    """Construct mail mapping, as dict {email: [names]}."""
-    separator = '::-::'
-    mail_map = defaultdict(set)
+CACHE_FILENAME = 'pch-mailmap-cache.json'
+# Bumped when the format of the cache changes
+CACHE_VERSION = 1
 
-    for line in check_output(
-        ['git', 'log', '--use-mailmap', '--pretty=%aN{}%aE'.format(separator)],
-        universal_newlines=True
-    ).splitlines():
+
+def mailmap_hash():
+    """Hash of the mailmap files and settings which git log would use."""
+    mailmap_file = cmd_output('git', 'config', '--get', 'mailmap.file', retcode=None).strip()
+    mailmap_blob = cmd_output('git', 'config', '--get', 'mailmap.blob', retcode=None).strip()
+    sources = [mailmap_file, mailmap_blob]
+    if mailmap_blob:
+        # The blob is named by a revision, e.g. HEAD:.mailmap, whose content may change
+        oid = cmd_output('git', 'rev-parse', '--verify', '-q', mailmap_blob, retcode=None)
+        sources.append(oid.strip() or 'missing')
+    try:
+        top_level = cmd_output('git', 'rev-parse', '--show-toplevel').rstrip('\n')
+    except CalledProcessError:  # bare repository
+        top_level = ''
+    for path in (os.path.join(top_level, '.mailmap') if top_level else '', mailmap_file):
+        if path and os.path.isfile(path):
+            with open(path, 'rb') as mailmap_file:
+                sources.append(blob_sha(mailmap_file.read()))
+    return blob_sha('\0'.join(sources).encode())
+
+
+def shortlog_mail_map(revisions):
+    """Mail mapping of the commits of `revisions`, as dict {email: set of names}.
+
+    `git shortlog -sne` applies the mailmap and counts the commits in C, and
+    only prints one line per author.
+    """
+    mail_map = {}
+    for line in cmd_output('git', 'shortlog', '-sne', revisions, '--').splitlines():
         if line:
-            name, email = line.split(separator)
-            email = email.lower()
-            mail_map[email] |= {name}
+            name, _, email = line.split('\t', 1)[1].rpartition(' <')
+            mail_map.setdefault(email.rstrip('>').lower(), set()).add(name)
+    return mail_map
+
+
+def _is_ancestor(commit, head):
+    try:
+        cmd_output('git', 'merge-base', '--is-ancestor', commit, head)
+    except CalledProcessError:  # not an ancestor, or garbage collected
+        return False
+    return True
+
 
+def _load_cache(path):
+    try:
+        with open(path) as cache_file:
+            cache = json.load(cache_file)
+    except (OSError, ValueError):
+        return None
+    return cache if isinstance(cache, dict) and cache.get('version') == CACHE_VERSION else None
+
+
+def _save_cache(path, head, mailmap, mail_map):
+    cache = {
+        'version': CACHE_VERSION,
+        'head': head,
+        'mailmap': mailmap,
+        'mail_map': {email: sorted(names) for email, names in mail_map.items()},
+    }
+    tmp_path = '{}.{}'.format(path, os.getpid())
+    try:
+        with open(tmp_path, 'w') as cache_file:
+            json.dump(cache, cache_file)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:  # never written, or already renamed
+            pass
+
+
+def get_git_mail_map(use_cache=True):
+    """Construct mail mapping, as dict {email: set of names}.
+
+    The mapping is kept in the git directory with the commit it was built
+    for and a hash of the mailmap, and only the commits since then are read.
+    It is rebuilt when that commit is no longer an ancestor of HEAD (rewritten
+    history), or when the mailmap changed.
+    """
+    try:
+        head = cmd_output('git', 'rev-parse', '--verify', '-q', 'HEAD').rstrip('\n')
+    except CalledProcessError:  # no commit yet
+        return {}
+    mailmap = mailmap_hash()
+    path = os.path.join(git_dir(), CACHE_FILENAME)
+    cache = _load_cache(path) if use_cache else None
+
+    if cache is None or cache['mailmap'] != mailmap:
+        mail_map = shortlog_mail_map(head)
+    else:
+        mail_map = {email: set(names) for email, names in cache['mail_map'].items()}
+        if cache['head'] == head:
+            return mail_map
+        if _is_ancestor(cache['head'], head):
+            new_commits = '{}..{}'.format(cache['head'], head)
+            for email, names in shortlog_mail_map(new_commits).items():
+                mail_map.setdefault(email, set()).update(names)
+        else:
+            mail_map = shortlog_mail_map(head)
+
+    if use_cache:
+        _save_cache(path, head, mailmap, mail_map)
     return mail_map
 
 
-def main():
+@timed
+def main(argv=None):
     """Run."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        'filenames',
+        nargs='*',
+        help='Ignored, the whole history is checked',
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        default=bool(os.environ.get('PCH_NO_CACHE')),
+        help='Read the whole history, without the mapping kept in the git directory',
+    )
+    args = parser.parse_args(argv)
+
     exit_val = 0
-    for email, names in get_git_mail_map().items():
+    for email, names in get_git_mail_map(not args.no_cache).items():
         if len(names) > 1:
             exit_val = 1
             print('The following email address is associated with more than one name:')
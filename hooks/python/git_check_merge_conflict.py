@@ -1,49 +1,74 @@
+"""Forbid merge conflict strings in the files committed during a merge or a rebase.
+
+Each file is searched at once with a multiline regex, and the line number is
+only computed for the strings found.
+"""
+from __future__ import annotations
+
 import argparse
 import os.path
+import re
 import sys
-from typing import Optional
-from typing import Sequence
-
-CONFLICT_PATTERNS = [
-    b'<<<<<<< ',
-    b'======= ',
-    b'=======\n',
-    b'>>>>>>> ',
-]
-
-
-def is_in_merge() -> int:
-    return (
-        os.path.exists(os.path.join('.git', 'MERGE_MSG')) and (
-            os.path.exists(os.path.join('.git', 'MERGE_HEAD')) or
-            os.path.exists(os.path.join('.git', 'rebase-apply')) or
-            os.path.exists(os.path.join('.git', 'rebase-merge'))
-        )
+
+from python.util import add_runner_arguments
+from python.util import CalledProcessError
+from python.util import git_dir
+from python.util import read_bytes
+from python.util import run_per_file
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Optional
+    from typing import Sequence
+
+# Regexes of the conflict strings, which only match at the start of a line
+CONFLICT_PATTERNS = (
+    br'<<<<<<< ',
+    br'=======(?: |\n|\Z)',
+    br'>>>>>>> ',
+)
+CONFLICT_REGEX = re.compile(b'^(?:%s)' % b'|'.join(CONFLICT_PATTERNS), re.MULTILINE)
+
+
+def is_in_merge() -> bool:
+    try:
+        directory = git_dir()
+    except CalledProcessError:  # not in a git repository
+        return False
+    return os.path.exists(os.path.join(directory, 'MERGE_MSG')) and any(
+        os.path.exists(os.path.join(directory, name))
+        for name in ('MERGE_HEAD', 'rebase-apply', 'rebase-merge')
     )
 
 
+def check_file(filename: str) -> int:
+    contents = read_bytes(filename)
+    retcode = 0
+    line = 1
+    line_pos = 0
+    for match in CONFLICT_REGEX.finditer(contents):
+        line += contents.count(b'\n', line_pos, match.start())
+        line_pos = match.start()
+        marker = match.group().rstrip(b'\n').decode()
+        print(
+            f'Merge conflict string "{marker}" '
+            f'found in {filename}:{line}',
+        )
+        retcode = 1
+    return retcode
+
+
 def main(argv: Optional[Sequence[str]] = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*')
     parser.add_argument('--assume-in-merge', action='store_true')
+    add_runner_arguments(parser)
     args = parser.parse_args(argv)
 
     if not is_in_merge() and not args.assume_in_merge:
         return 0
 
-    retcode = 0
-    for filename in args.filenames:
-        with open(filename, 'rb') as inputfile:
-            for i, line in enumerate(inputfile):
-                for pattern in CONFLICT_PATTERNS:
-                    if line.startswith(pattern):
-                        print(
-                            f'Merge conflict string "{pattern.decode()}" '
-                            f'found in {filename}:{i + 1}',
-                        )
-                        retcode = 1
-
-    return retcode
+    return run_per_file(check_file, args.filenames, args)
 
 
 if __name__ == '__main__':
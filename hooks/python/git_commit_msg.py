@@ -12,9 +12,12 @@ from pathlib import Path
 import re
 import sys
 
+from python.timings import timed
+
 COMMIT_RE = re.compile(r'\[\+?\*?-?~?\^?\]')
 
 
+@timed
 def main():
     """Inspect the commit message."""
 
@@ -0,0 +1,136 @@
+"""Forbid a dirty git tree: modified, staged or untracked files.
+
+The checks stop at the first change found: tracked files are compared first,
+as by `git diff --quiet` and `git diff --cached --quiet`, once the stat data
+of the index is refreshed, and only then are untracked files looked for,
+which may walk many directories.  They are listed by `git status` when
+core.untrackedCache or core.fsmonitor is configured, and by `git ls-files`
+otherwise.  Files ignored by .gitignore are not reported.
+
+Nothing is checked from a git pre-commit hook (GIT_INDEX_FILE is set), as
+the tree is dirty by definition then.
+"""
+import argparse
+import os
+import sys
+from typing import List
+from typing import Optional
+from typing import Sequence
+
+from python.timings import timed
+from python.util import CalledProcessError
+from python.util import cmd_output
+from python.util import head_tree
+
+
+def pathspecs(include: Sequence[str], exclude: Sequence[str]) -> List[str]:
+    return list(include) + [':(exclude){}'.format(path) for path in exclude]
+
+
+def has_changes(*cmd: str) -> bool:
+    """Whether a `git diff* --quiet` command found a change."""
+    try:
+        cmd_output(*cmd)
+    except CalledProcessError as error:
+        _, _, returncode, _, _ = error.args
+        if returncode != 1:
+            raise
+        return True
+    return False
+
+
+def uses_status_cache() -> bool:
+    """Whether core.untrackedCache or core.fsmonitor can speed `git status` up."""
+    cmd = ('git', 'config', '--get-regexp', r'^core\.(untrackedcache|fsmonitor)$')
+    for entry in cmd_output(*cmd, retcode=None).splitlines():
+        _, _, value = entry.partition(' ')
+        if value.lower() not in ('', 'false', 'no', 'off', '0'):
+            return True
+    return False
+
+
+def first_entry(*cmd: str) -> Optional[str]:
+    """First NUL-terminated entry output by `cmd`, which is killed once it is read."""
+    import subprocess  # pylint: disable=import-outside-toplevel
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as proc:
+        assert proc.stdout is not None
+        output = b''
+        while b'\0' not in output:
+            chunk = proc.stdout.read1(65536)
+            if not chunk:
+                break
+            output += chunk
+        else:
+            proc.kill()  # the rest of the walk is not needed
+            return os.fsdecode(output.split(b'\0', 1)[0])
+        _, stderr = proc.communicate()
+    if proc.returncode:
+        raise CalledProcessError(cmd, 0, proc.returncode, output.decode(), stderr)
+    return None
+
+
+def first_untracked(paths: Sequence[str]) -> Optional[str]:
+    if uses_status_cache():
+        entry = first_entry(
+            'git', 'status', '--porcelain', '-z', '--untracked-files=normal',
+            '--ignore-submodules=all', '--no-renames', '--', *paths
+        )
+        # Drop the status letters, only untracked files are left to report
+        return entry[3:] if entry is not None else None
+    return first_entry(
+        'git', 'ls-files', '-z', '--others', '--exclude-standard', '--directory',
+        '--no-empty-directory', '--', *paths
+    )
+
+
+def find_dirt(paths: Sequence[str]) -> Optional[str]:
+    """Description of the first change of the tree found, None if it is clean."""
+    # Files only touched would be reported as changed by diff-files otherwise
+    cmd_output('git', 'update-index', '-q', '--refresh', retcode=None)
+    if has_changes('git', 'diff-files', '--quiet', '--', *paths):
+        return 'Unstaged changes in the work tree'
+    if has_changes('git', 'diff-index', '--cached', '--quiet', head_tree(), '--', *paths):
+        return 'Staged changes not committed'
+    untracked = first_untracked(paths)
+    if untracked is not None:
+        return f'Untracked file: {untracked}'
+    return None
+
+
+@timed
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        'filenames',
+        nargs='*',
+        help='Ignored, use --include and --exclude to restrict the paths checked',
+    )
+    parser.add_argument(
+        '--include',
+        action='append',
+        default=[],
+        metavar='PATHSPEC',
+        help='Only check these paths, can be repeated (default: the whole tree)',
+    )
+    parser.add_argument(
+        '--exclude',
+        action='append',
+        default=[],
+        metavar='PATHSPEC',
+        help='Do not check these paths, e.g. build outputs, can be repeated',
+    )
+    args = parser.parse_args(argv)
+
+    if 'GIT_INDEX_FILE' in os.environ:
+        return 0
+
+    dirt = find_dirt(pathspecs(args.include, args.exclude))
+    if dirt is None:
+        return 0
+    print(dirt)
+    print('Run `git status` for details.')
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,11 @@
 from __future__ import print_function
-import argparse, sys
+import argparse, functools, io, sys
 from lxml.etree import iterparse
 
+from python.util import add_runner_arguments
+from python.util import read_bytes
+from python.util import run_per_file
+
 
 def main(argv=None):
     parser = argparse.ArgumentParser()
@@ -12,10 +16,15 @@ def main(argv=None):
         default=[],
         help='Comma-separated list of forbidden attribute names'
     )
+    add_runner_arguments(parser)
     args = parser.parse_args(argv)
-    matches = list(iterate_forbidden_attributes(args.filenames, args.forbidden_attributes))
+    check = functools.partial(check_file, forbidden_attributes=args.forbidden_attributes)
+    return run_per_file(check, args.filenames, args)
+
+
+def check_file(html_filename, forbidden_attributes):
     return_error_code = 0
-    for filename, attr_name in matches:
+    for filename, attr_name in iterate_forbidden_attributes([html_filename], forbidden_attributes):
         print('Forbidden HTML attribute "{}" found in {}'.format(attr_name, filename))
         return_error_code = 1
     return return_error_code
@@ -24,7 +33,7 @@ def main(argv=None):
 def iterate_forbidden_attributes(html_filenames, forbidden_attributes):
     forbidden_attributes = set(forbidden_attributes)
     for html_filename in html_filenames:
-        with open(html_filename, 'rb') as html_file:
+        with io.BytesIO(read_bytes(html_filename)) as html_file:
             for _, elem in iterparse(html_file, html=True, remove_comments=True):
                 for attribute_name in elem.attrib.keys():
                     if attribute_name in forbidden_attributes:
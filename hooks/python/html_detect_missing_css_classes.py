@@ -1,9 +1,13 @@
 from __future__ import print_function
-import argparse, os, re, sys
+import argparse, io, os, re, sys
 from lxml.etree import iterparse
 from tinycss2 import parse_stylesheet_bytes
 
+from python.timings import timed
+from python.util import read_bytes
 
+
+@timed
 def main(argv=None):
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*', help='filenames to check')
@@ -69,8 +73,7 @@ def scandir(dirname, file_extensions):
 
 
 def extract_css_classes_definitions(css_file):
-    with open(css_file, 'rb') as open_file:
-        rules, _ = parse_stylesheet_bytes(open_file.read())
+    rules, _ = parse_stylesheet_bytes(read_bytes(css_file))
     next_is_class_name = False
     while rules:
         rule = rules.pop(0)
@@ -85,7 +88,7 @@ def extract_css_classes_definitions(css_file):
 
 def extract_css_classes_usages(html_file):
     # CAN BE IMPROVED: extract (data-)ng-class & (data-)ng-style
-    for _, elem in iterparse(html_file, html=True, remove_comments=True):
+    for _, elem in iterparse(io.BytesIO(read_bytes(html_file)), html=True, remove_comments=True):
         if 'class' not in elem.attrib.keys():
             continue
         for css_class in elem.attrib['class'].split(' '):
@@ -1,15 +1,23 @@
 from __future__ import print_function
-import argparse, sys
+import argparse, io, sys
 from lxml.etree import iterparse
 
+from python.util import add_runner_arguments
+from python.util import read_bytes
+from python.util import run_per_file
+
 
 def main(argv=None):
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*', help='filenames to check')
+    add_runner_arguments(parser)
     args = parser.parse_args(argv)
-    html_files_with_missing_img_alt = list(iterate_img_without_alt(args.filenames))
+    return run_per_file(check_file, args.filenames, args)
+
+
+def check_file(html_filename):
     return_error_code = 0
-    for filename in html_files_with_missing_img_alt:
+    for filename in iterate_img_without_alt([html_filename]):
         print('<img> tag without alt text found in {}'.format(filename))
         return_error_code = 1
     return return_error_code
@@ -17,7 +25,7 @@ def main(argv=None):
 
 def iterate_img_without_alt(html_filenames):
     for html_filename in html_filenames:
-        with open(html_filename, 'rb') as html_file:
+        with io.BytesIO(read_bytes(html_filename)) as html_file:
             for _, elem in iterparse(html_file, html=True, tag='img'):
                 if 'alt' not in elem.attrib and 'data-ng-attr-alt' not in elem.attrib:
                     yield html_filename  # sadly elem.sourceline is None :(
@@ -1,8 +1,12 @@
 from __future__ import print_function
-import argparse, sys
+import argparse, functools, io, sys
 from lxml.etree import iterparse
 from lxml.html import defs
 
+from python.util import add_runner_arguments
+from python.util import read_bytes
+from python.util import run_per_file
+
 
 def main(argv=None):
     parser = argparse.ArgumentParser()
@@ -13,12 +17,15 @@ def main(argv=None):
         default=[],
         help='Comma-separated list of extra valid attribute names'
     )
+    add_runner_arguments(parser)
     args = parser.parse_args(argv)
-    non_std_attr_matches = list(
-        iterate_non_std_attributes(args.filenames, args.extra_known_attributes)
-    )
+    check = functools.partial(check_file, extra_known_attributes=args.extra_known_attributes)
+    return run_per_file(check, args.filenames, args)
+
+
+def check_file(html_filename, extra_known_attributes):
     return_error_code = 0
-    for filename, attribute in non_std_attr_matches:
+    for filename, attribute in iterate_non_std_attributes([html_filename], extra_known_attributes):
         print('Non-standard HTML attribute found in {}: {}'.format(filename, attribute))
         return_error_code = 1
     return return_error_code
@@ -29,7 +36,7 @@ def iterate_non_std_attributes(html_filenames, extra_known_attributes):
         extra_known_attributes
     )
     for html_filename in html_filenames:
-        with open(html_filename, 'rb') as html_file:
+        with io.BytesIO(read_bytes(html_filename)) as html_file:
             for _, elem in iterparse(html_file, html=True, remove_comments=True):
                 for attribute_name in elem.attrib.keys():
                     if not any(
@@ -1,14 +1,14 @@
-import argparse, contextlib, logging, os, re, shutil, sys
+import argparse, contextlib, functools, logging, os, re, shutil, sys
 from collections import defaultdict
-from six import raise_from, text_type
-from jinja2 import Environment, FileSystemLoader
-from jinja2.defaults import DEFAULT_NAMESPACE
-from jinja2.runtime import Context
-from jinja2.utils import concat
-from pybars import Compiler as PybarCompiler, PybarsError
-from html5validator.validator import Validator
 
+# html5validator, jinja2 and pybars are imported where they are used: files known to pass
+# from the result cache do not need them, and only --remove-mustaches needs a template engine
+from python.timings import timed
+from python.util import add_runner_arguments
+from python.util import read_bytes
 
+
+@timed
 def main(argv=None):
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*', help='filenames to check')
@@ -73,9 +73,22 @@ def main(argv=None):
         help=('log level: DEBUG, INFO or WARNING '
               '(default: WARNING)')
     )
+    add_runner_arguments(parser)
     args = parser.parse_args(argv)
 
+    cache = None
+    # Jinja2 templates include and extend other files, which are not in the key
+    if not args.no_cache and not (args.remove_mustaches and args.mustache_remover == 'jinja2'):
+        from python.result_cache import ResultCache  # pylint: disable=import-outside-toplevel
+        cache = ResultCache.for_hook(main, args)
+    if cache is not None:
+        # CSS and HTML files are validated differently
+        unknown = cache.unknown(args.filenames, read_bytes, by_extension=True)
+        args.filenames = list(unknown)
+
     if not args.filenames:
+        if cache is not None:
+            cache.close()
         return 0
 
     logging.basicConfig(level=getattr(logging, args.log))
@@ -93,10 +106,16 @@ def main(argv=None):
         ignore=args.ignore,
         ignore_re=args.ignore_re
     )
-    return validator.validate(
+    retv = validator.validate(
         args.filenames,
         remove_mustaches=args.remove_mustaches,
     )
+    if cache is not None:
+        # The validator only reports a global status: record passes if all files passed
+        if not retv:
+            cache.add(unknown.values())
+        cache.close()
+    return retv
 
 
 class Placeholder:
@@ -106,34 +125,38 @@ class Placeholder:
         self.env = {k: eval(v) for k, v in env or ()}
 
 
-class CustomHTMLValidator(Validator):
+class CustomHTMLValidator:
     def __init__(
         self, mustache_remover_name, mustache_remover_copy_ext, mustache_remover_placeholder,
         templates_include_dir, *args, **kwargs
     ):
-        Validator.__init__(self, *args, **kwargs)
+        from html5validator.validator import Validator  # pylint: disable=import-outside-toplevel
+        self.validator = Validator(*args, **kwargs)
+        self.mustache_remover_name = mustache_remover_name
         self.mustache_remover_copy_ext = mustache_remover_copy_ext
         self.mustache_remover_placeholder = mustache_remover_placeholder
-        if mustache_remover_name == 'jinja2':
-            self.mustache_remover = Jinja2MustacheRemover(templates_include_dir)
-        elif mustache_remover_name == 'pybar':
-            self.mustache_remover = PybarMustacheRemover()
-        else:
-            self.mustache_remover = RegexMustacheRemover()
+        self.templates_include_dir = templates_include_dir
+
+    def make_mustache_remover(self):
+        if self.mustache_remover_name == 'jinja2':
+            return Jinja2MustacheRemover(self.templates_include_dir)
+        if self.mustache_remover_name == 'pybar':
+            return PybarMustacheRemover()
+        return RegexMustacheRemover()
 
     def validate(self, files=None, remove_mustaches=False):
         if not files:
-            files = self.all_files()
+            files = self.validator.all_files()
         if remove_mustaches:
             with generate_mustachefree_tmpfiles(
                 files,
-                self.mustache_remover,
+                self.make_mustache_remover(),
                 copy_ext=self.mustache_remover_copy_ext,
                 placeholder=self.mustache_remover_placeholder
             ) as tmpfiles:
-                return Validator.validate(self, tmpfiles)
+                return self.validator.validate(tmpfiles)
         else:
-            return Validator.validate(self, files)
+            return self.validator.validate(files)
 
 
 @contextlib.contextmanager
@@ -168,19 +191,20 @@ class RegexMustacheRemover:
 
 class PybarMustacheRemover:
     def __init__(self):
-        self.tmplt_compiler = PybarCompiler()
+        from pybars import Compiler  # pylint: disable=import-outside-toplevel
+        self.tmplt_compiler = Compiler()
 
     def clean_template(self, filepath, placeholder):
+        from pybars import PybarsError  # pylint: disable=import-outside-toplevel
         with open(filepath, 'r') as src_file:
-            template_content = text_type(src_file.read())
+            template_content = src_file.read()
         try:
             compiled_template = self.tmplt_compiler.compile(template_content)
             return compiled_template(PybarPlaceholderContext(placeholder))
         except PybarsError as error:
-            raise_from(
-                MustacheSubstitutionFail('For HTML template file {}: {}'.format(filepath, error)),
-                error
-            )
+            raise MustacheSubstitutionFail(
+                'For HTML template file {}: {}'.format(filepath, error)
+            ) from error
 
 
 class PybarPlaceholderContext:
@@ -198,45 +222,57 @@ class Jinja2MustacheRemover:
         self.template_loader_extra_paths = [templates_include_dir] if templates_include_dir else []
 
     def clean_template(self, filepath, placeholder):
-        env = Jinja2PlaceholderEnvironment(
+        # pylint: disable=import-outside-toplevel
+        from jinja2 import FileSystemLoader
+        from jinja2.defaults import DEFAULT_NAMESPACE
+        from jinja2.utils import concat
+        environment_class, context_class = jinja2_placeholder_classes()
+        env = environment_class(
             placeholder,
             loader=FileSystemLoader(
                 [os.path.dirname(filepath)] + self.template_loader_extra_paths
             )
         )
         template = env.get_template(os.path.basename(filepath))
-        context = Jinja2PlaceholderContext(
+        context = context_class(
             placeholder, env, DEFAULT_NAMESPACE.copy(), template.name, template.blocks
         )
         return concat(template.root_render_func(context))
 
 
-class Jinja2PlaceholderEnvironment(Environment):
-    def __init__(self, placeholder, *args, **kwargs):
-        Environment.__init__(self, *args, **kwargs)
-        self.placeholder = placeholder
-        filters = DefaultDict(lambda: (lambda _: ''))
-        # pylint: disable=access-member-before-definition
-        filters.update(self.filters)
-        self.filters = filters
+@functools.lru_cache(maxsize=None)
+def jinja2_placeholder_classes():
+    """Environment and Context subclasses, defined on first use of jinja2."""
+    from jinja2 import Environment  # pylint: disable=import-outside-toplevel
+    from jinja2.runtime import Context  # pylint: disable=import-outside-toplevel
 
-    def getattr(self, *_, **__):
-        return RecursiveDefaultPlaceholder(self.placeholder.default_value)
+    class Jinja2PlaceholderEnvironment(Environment):
+        def __init__(self, placeholder, *args, **kwargs):
+            Environment.__init__(self, *args, **kwargs)
+            self.placeholder = placeholder
+            filters = DefaultDict(lambda: (lambda _: ''))
+            # pylint: disable=access-member-before-definition
+            filters.update(self.filters)
+            self.filters = filters
 
+        def getattr(self, *_, **__):
+            return RecursiveDefaultPlaceholder(self.placeholder.default_value)
 
-class Jinja2PlaceholderContext(Context):
-    def __init__(self, placeholder, *args, **kwargs):
-        Context.__init__(self, *args, **kwargs)
-        self.placeholder = placeholder
+    class Jinja2PlaceholderContext(Context):
+        def __init__(self, placeholder, *args, **kwargs):
+            Context.__init__(self, *args, **kwargs)
+            self.placeholder = placeholder
 
-    def call(self, *_, **__):
-        return RecursiveDefaultPlaceholder(self.placeholder.default_value)
+        def call(self, *_, **__):
+            return RecursiveDefaultPlaceholder(self.placeholder.default_value)
 
-    # pylint: disable=unused-argument
-    def resolve_or_missing(self, key, missing=None):
-        if key in self.placeholder.env:
-            return self.placeholder.env[key]
-        return RecursiveDefaultPlaceholder(self.placeholder.default_value)
+        # pylint: disable=unused-argument
+        def resolve_or_missing(self, key, missing=None):
+            if key in self.placeholder.env:
+                return self.placeholder.env[key]
+            return RecursiveDefaultPlaceholder(self.placeholder.default_value)
+
+    return Jinja2PlaceholderEnvironment, Jinja2PlaceholderContext
 
 
 class RecursiveDefaultPlaceholder(str):  # must be JSON serializable to support |tojson filter
@@ -4,22 +4,31 @@ import sys
 from typing import Optional
 from typing import Sequence
 
+from python.timings import phase
+from python.util import add_runner_arguments
+from python.util import read_bytes
+from python.util import run_per_file
+
+
+def check_file(filename: str) -> int:
+    contents = read_bytes(filename)
+    try:
+        with phase('parse'):
+            json.loads(contents)
+    # TODO: need UnicodeDecodeError?
+    except (ValueError, UnicodeDecodeError) as exc:
+        print('{}: Failed to json decode ({})'.format(filename, exc))
+        return 1
+    return 0
+
 
 def main(argv: Optional[Sequence[str]] = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*', help='Filenames to check.')
+    add_runner_arguments(parser)
     args = parser.parse_args(argv)
 
-    retval = 0
-    for filename in args.filenames:
-        with open(filename, 'rb') as file_handler:
-            try:
-                json.load(file_handler)
-            # TODO: need UnicodeDecodeError?
-            except (ValueError, UnicodeDecodeError) as exc:
-                print('{}: Failed to json decode ({})'.format(filename, exc))
-                retval = 1
-    return retval
+    return run_per_file(check_file, args.filenames, args, cacheable=True)
 
 
 if __name__ == '__main__':
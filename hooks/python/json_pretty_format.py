@@ -1,7 +1,8 @@
 import argparse
+import functools
 import json
-from difflib import unified_diff
 import sys
+from typing import Callable
 from typing import List
 from typing import Mapping
 from typing import Optional
@@ -9,6 +10,13 @@ from typing import Sequence
 from typing import Tuple
 from typing import Union
 
+from python.timings import phase
+from python.util import add_runner_arguments
+from python.util import decode_text
+from python.util import read_text
+from python.util import run_per_file
+from python.util import write_bytes
+
 
 def _get_pretty_format(
     contents: str,
@@ -35,8 +43,7 @@ def _get_pretty_format(
 
 def _autofix(filename: str, new_contents: str) -> None:
     print('Fixing file {}'.format(filename))
-    with open(filename, 'w', encoding='UTF-8') as file_handler:
-        file_handler.write(new_contents)
+    write_bytes(filename, new_contents.encode('UTF-8'))
 
 
 def parse_num_to_int(string: str) -> Union[int, str]:
@@ -52,13 +59,72 @@ def parse_topkeys(string: str) -> List[str]:
 
 
 def get_diff(source: str, target: str, file: str) -> str:
+    from difflib import unified_diff  # pylint: disable=import-outside-toplevel
     source_lines = source.splitlines(True)
     target_lines = target.splitlines(True)
     diff = unified_diff(source_lines, target_lines, fromfile=file, tofile=file)
     return ''.join(diff)
 
 
-def main(argv: Optional[Sequence[str]] = None) -> int:
+def fix_contents(
+    contents: bytes,
+    filename: str,  # pylint: disable=unused-argument
+    indent: Union[int, str],
+    ensure_ascii: bool,
+    sort_keys: bool,
+    top_keys: Sequence[str],
+) -> bytes:
+    """Pretty-formatted contents, ValueError if they are not valid JSON."""
+    text = decode_text(contents)
+    pretty_contents = _get_pretty_format(
+        text,
+        indent,
+        ensure_ascii=ensure_ascii,
+        sort_keys=sort_keys,
+        top_keys=top_keys,
+    )
+    # Only the end-lines differ: the hook itself would not touch the file
+    if text == pretty_contents:
+        return contents
+    return pretty_contents.encode('UTF-8')
+
+
+def _check_filename(
+    json_file: str,
+    indent: Union[int, str],
+    ensure_ascii: bool,
+    sort_keys: bool,
+    top_keys: Sequence[str],
+    autofix: bool,
+) -> int:
+    contents = read_text(json_file)
+
+    try:
+        with phase('check'):
+            pretty_contents = _get_pretty_format(
+                contents,
+                indent,
+                ensure_ascii=ensure_ascii,
+                sort_keys=sort_keys,
+                top_keys=top_keys,
+            )
+    except ValueError:
+        print(f'Input File {json_file} is not a valid JSON, consider using ' f'check-json', )
+        return 1
+
+    if contents != pretty_contents:
+        if autofix:
+            _autofix(json_file, pretty_contents)
+        else:
+            print(
+                get_diff(contents, pretty_contents, json_file),
+                end='',
+            )
+        return 1
+    return 0
+
+
+def _make_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser()
     parser.add_argument(
         '--autofix',
@@ -98,38 +164,34 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         help='Ordered list of keys to keep at the top of JSON hashes',
     )
     parser.add_argument('filenames', nargs='*', help='Filenames to fix')
-    args = parser.parse_args(argv)
-
-    status = 0
-
-    for json_file in args.filenames:
-        with open(json_file, encoding='UTF-8') as file_handler:
-            contents = file_handler.read()
+    add_runner_arguments(parser)
+    return parser
+
+
+def build_stage(argv: Sequence[str]) -> Callable[[bytes, str], bytes]:
+    """Fix of the contents of a file, for generic-fix-pipeline: always --autofix."""
+    args = _make_parser().parse_args(argv)
+    return functools.partial(
+        fix_contents,
+        indent=args.indent,
+        ensure_ascii=not args.no_ensure_ascii,
+        sort_keys=not args.no_sort_keys,
+        top_keys=args.top_keys,
+    )
 
-        try:
-            pretty_contents = _get_pretty_format(
-                contents,
-                args.indent,
-                ensure_ascii=not args.no_ensure_ascii,
-                sort_keys=not args.no_sort_keys,
-                top_keys=args.top_keys,
-            )
 
-            if contents != pretty_contents:
-                if args.autofix:
-                    _autofix(json_file, pretty_contents)
-                else:
-                    print(
-                        get_diff(contents, pretty_contents, json_file),
-                        end='',
-                    )
-
-                status = 1
-        except ValueError:
-            print(f'Input File {json_file} is not a valid JSON, consider using ' f'check-json', )
-            return 1
-
-    return status
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = _make_parser().parse_args(argv)
+
+    check = functools.partial(
+        _check_filename,
+        indent=args.indent,
+        ensure_ascii=not args.no_ensure_ascii,
+        sort_keys=not args.no_sort_keys,
+        top_keys=args.top_keys,
+        autofix=args.autofix,
+    )
+    return run_per_file(check, args.filenames, args)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,89 @@
+"""Find every occurrence of a set of byte strings in one pass.
+
+The patterns are merged into a trie, written as a regex whose alternatives
+each consume the first byte of a pattern and look ahead for the rest: the
+regex engine jumps from one candidate first byte to the next in C, then
+walks the trie from there.  A match at a position does not prevent matches
+starting inside it, and patterns which are prefixes of a longer match at the
+same position are reported too, so the cost grows with the size of the input
+and the number of matches, not with the number of patterns.
+"""
+from __future__ import annotations
+
+import functools
+import re
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Dict
+    from typing import Iterable
+    from typing import Iterator
+    from typing import List
+    from typing import Optional
+    from typing import Pattern
+    from typing import Tuple
+
+# Marks the end of a pattern in a trie node
+_END = -1
+
+
+def _trie(patterns: Iterable[bytes]) -> Dict[int, dict]:
+    root: Dict[int, dict] = {}
+    for pattern in patterns:
+        node = root
+        for byte in pattern:
+            node = node.setdefault(byte, {})
+        node[_END] = {}
+    return root
+
+
+def _regex(node: Dict[int, dict]) -> bytes:
+    """Regex matching the longest pattern of the subtrie `node`."""
+    branches = [
+        re.escape(bytes((byte, ))) + _regex(child)
+        for byte, child in sorted(node.items()) if byte != _END
+    ]
+    if not branches:
+        return b''
+    regex = branches[0] if len(branches) == 1 else b'(?:' + b'|'.join(branches) + b')'
+    if _END in node:
+        regex = b'(?:' + regex + b')?'
+    return regex
+
+
+class LiteralSet:
+    def __init__(self, patterns: Iterable[bytes]) -> None:
+        self.patterns = frozenset(pattern for pattern in patterns if pattern)
+        self.lengths = sorted({len(pattern) for pattern in self.patterns}, reverse=True)
+        heads_and_tails = [
+            (re.escape(bytes((byte, ))), _regex(child))
+            for byte, child in sorted(_trie(self.patterns).items())
+        ]
+        # One regex per first byte, to embed the set in a larger regex
+        self.branches = tuple(head + tail for head, tail in heads_and_tails)
+        self.regex: Optional[Pattern[bytes]] = re.compile(
+            b'|'.join(head + b'(?=(' + tail + b'))' for head, tail in heads_and_tails)
+        ) if heads_and_tails else None
+
+    def finditer(self, data: bytes, start: int = 0) -> Iterator[Tuple[int, bytes]]:
+        """Offset and pattern of each occurrence, by offset then longest first."""
+        if self.regex is None:
+            return
+        for match in self.regex.finditer(data, start):
+            longest = match.group() + match.group(match.lastindex or 0)
+            for length in self.lengths:
+                if length <= len(longest) and longest[:length] in self.patterns:
+                    yield match.start(), longest[:length]
+
+    def search(self, data: bytes, start: int = 0) -> Optional[Tuple[int, bytes]]:
+        """First occurrence, None if there is none."""
+        return next(self.finditer(data, start), None)
+
+    def findall(self, data: bytes, start: int = 0) -> List[Tuple[int, bytes]]:
+        return list(self.finditer(data, start))
+
+
+@functools.lru_cache(maxsize=None)
+def literal_set(patterns: Tuple[bytes, ...]) -> LiteralSet:
+    """LiteralSet built once per process for a given tuple of patterns."""
+    return LiteralSet(patterns)
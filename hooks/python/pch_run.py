@@ -0,0 +1,166 @@
+"""Run several hooks in one interpreter, reading each file only once.
+
+Every hook is given as a console script name followed by its own arguments,
+e.g.::
+
+    pch-run --hook python-check-ast \\
+            --hook 'json-pretty-format --autofix --indent=2 --pch-files=\\.json$' \\
+            -- file1.py file2.json
+
+The `--pch-files` / `--pch-exclude` regexes restrict the filenames handed to
+a given hook; they are consumed by the runner and not passed to the hook.
+"""
+import argparse
+import importlib
+import os
+import re
+import shlex
+import sys
+from typing import Any
+from typing import Callable
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Pattern
+from typing import Sequence
+from typing import Tuple
+
+from python import timings
+from python.util import forget_contents
+from python.util import shared_view
+from python.util import SHARED_VIEW_MAX_BYTES
+
+FILES_OPTION = '--pch-files='
+EXCLUDE_OPTION = '--pch-exclude='
+
+
+class Hook(NamedTuple):
+    hook_id: str
+    main: Callable[..., Optional[int]]
+    args: List[str]
+    files: Optional[Pattern[str]]
+    exclude: Optional[Pattern[str]]
+
+    def filenames(self, filenames: Sequence[str]) -> List[str]:
+        return [
+            filename for filename in filenames
+            if is_selected(filename, self.files, self.exclude)
+        ]
+
+    def run(self, filenames: Sequence[str]) -> int:
+        # inspect is slow to import, and generic-fix-pipeline imports this module
+        import inspect  # pylint: disable=import-outside-toplevel
+        try:
+            if not inspect.signature(self.main).parameters:
+                # Hooks without arguments (e.g. git-commit-msg) use no filenames
+                return self.main() or 0
+            return self.main(self.args + self.filenames(filenames)) or 0
+        except SystemExit as exc:  # argparse errors, explicit sys.exit()
+            if exc.code is None:
+                return 0
+            return exc.code if isinstance(exc.code, int) else 1
+
+
+def is_selected(
+    filename: str,
+    files: Optional[Pattern[str]],
+    exclude: Optional[Pattern[str]],
+) -> bool:
+    return (files is None or bool(files.search(filename))) and (
+        exclude is None or not exclude.search(filename)
+    )
+
+
+def split_spec(
+    spec: str
+) -> Tuple[str, List[str], Optional[Pattern[str]], Optional[Pattern[str]]]:
+    """Hook id, hook arguments, and the --pch-files / --pch-exclude regexes."""
+    hook_id, *tokens = shlex.split(spec)
+    files = exclude = None
+    args = []
+    for token in tokens:
+        if token.startswith(FILES_OPTION):
+            files = re.compile(token[len(FILES_OPTION):])
+        elif token.startswith(EXCLUDE_OPTION):
+            exclude = re.compile(token[len(EXCLUDE_OPTION):])
+        else:
+            args.append(token)
+    return hook_id, args, files, exclude
+
+
+def import_hook(hook_id: str, entry_point: str = 'main') -> Callable[..., Any]:
+    """Function `entry_point` of the module of a hook."""
+    try:
+        module = importlib.import_module('python.{}'.format(hook_id.replace('-', '_')))
+    except ImportError as exc:
+        raise ValueError('{}: cannot load hook ({})'.format(hook_id, exc)) from exc
+    function = getattr(module, entry_point, None)
+    if not callable(function):
+        raise ValueError('{}: no {} entry point'.format(hook_id, entry_point))
+    return function
+
+
+def parse_hook(spec: str) -> Hook:
+    hook_id, args, files, exclude = split_spec(spec)
+    return Hook(hook_id, import_hook(hook_id), args, files, exclude)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        '--hook',
+        dest='hooks',
+        action='append',
+        default=[],
+        metavar='"HOOK-ID [ARGS...]"',
+        help='Console script name of a hook, with its arguments. Can be repeated.',
+    )
+    parser.add_argument(
+        '--timings',
+        metavar='FILE',
+        help='Record the time and memory used by every hook in FILE, see PCH_TIMINGS',
+    )
+    parser.add_argument(
+        '--max-view-bytes',
+        type=int,
+        default=os.environ.get('PCH_VIEW_MAX_BYTES', str(SHARED_VIEW_MAX_BYTES)),
+        metavar='N',
+        help='Size of the file contents kept in memory across hooks (default: %(default)s)',
+    )
+    parser.add_argument('filenames', nargs='*', help='Filenames shared by all hooks')
+    args = parser.parse_args(argv)
+    if args.timings:
+        # Read by every hook, whether it runs files through run_per_file() or not
+        os.environ[timings.ENV_VAR] = args.timings
+
+    hooks = []
+    for spec in args.hooks:
+        try:
+            hooks.append(parse_hook(spec))
+        except ValueError as exc:
+            parser.error(str(exc))
+
+    # Index of the last hook given each file, after which it leaves the view
+    last_use = {
+        filename: index
+        for index, hook in enumerate(hooks) for filename in hook.filenames(args.filenames)
+    }
+    retv = 0
+    with shared_view(args.max_view_bytes):
+        for index, hook in enumerate(hooks):
+            ret_for_hook = hook.run(args.filenames)
+            if ret_for_hook:
+                print('{}: failed (exit code {})'.format(hook.hook_id, ret_for_hook))
+            retv |= ret_for_hook
+            for filename, last_index in last_use.items():
+                if last_index == index:
+                    forget_contents(filename)
+
+    return retv
+
+
+if __name__ == '__main__':
+    sys.exit(main())
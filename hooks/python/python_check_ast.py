@@ -1,31 +1,40 @@
 import argparse
 import ast
-import platform
 import sys
-import traceback
 from typing import Optional
 from typing import Sequence
 
+from python.timings import phase
+from python.util import add_runner_arguments
+from python.util import read_bytes
+from python.util import run_per_file
+
+
+def check_file(filename: str) -> int:
+    source = read_bytes(filename)
+    try:
+        with phase('parse'):
+            ast.parse(source, filename=filename)
+    except SyntaxError:
+        # pylint: disable=import-outside-toplevel
+        import platform
+        import traceback
+        impl = platform.python_implementation()
+        version = sys.version.split()[0]
+        print('{}: failed parsing with {} {}:'.format(filename, impl, version))
+        trace = '    ' + traceback.format_exc().replace('\n', '\n    ')
+        print('\n{}'.format(trace))
+        return 1
+    return 0
+
 
 def main(argv: Optional[Sequence[str]] = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*')
+    add_runner_arguments(parser)
     args = parser.parse_args(argv)
 
-    retval = 0
-    for filename in args.filenames:
-
-        try:
-            with open(filename, 'rb') as file_handler:
-                ast.parse(file_handler.read(), filename=filename)
-        except SyntaxError:
-            impl = platform.python_implementation()
-            version = sys.version.split()[0]
-            print('{}: failed parsing with {} {}:'.format(filename, impl, version))
-            trace = '    ' + traceback.format_exc().replace('\n', '\n    ')
-            print('\n{}'.format(trace))
-            retval = 1
-    return retval
+    return run_per_file(check_file, args.filenames, args, cacheable=True)
 
 
 if __name__ == '__main__':
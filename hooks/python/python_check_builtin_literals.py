@@ -1,4 +1,5 @@
 import argparse
+import functools
 import ast
 import sys
 from typing import List
@@ -7,6 +8,11 @@ from typing import Optional
 from typing import Sequence
 from typing import Set
 
+from python.timings import phase
+from python.util import add_runner_arguments
+from python.util import read_bytes
+from python.util import run_per_file
+
 BUILTIN_TYPES = {
     'complex': '0j',
     'dict': '{}',
@@ -57,10 +63,12 @@ def check_file(
     ignore: Optional[Sequence[str]] = None,
     allow_dict_kwargs: bool = True,
 ) -> List[Call]:
-    with open(filename, 'rb') as file_handler:
-        tree = ast.parse(file_handler.read(), filename=filename)
+    source = read_bytes(filename)
+    with phase('parse'):
+        tree = ast.parse(source, filename=filename)
     visitor = Visitor(ignore=ignore, allow_dict_kwargs=allow_dict_kwargs)
-    visitor.visit(tree)
+    with phase('check'):
+        visitor.visit(tree)
     return visitor.builtin_type_calls
 
 
@@ -68,6 +76,16 @@ def parse_ignore(value: str) -> Set[str]:
     return set(value.split(','))
 
 
+def _check_filename(filename: str, ignore: Set[str], allow_dict_kwargs: bool) -> int:
+    calls = check_file(filename, ignore=ignore, allow_dict_kwargs=allow_dict_kwargs)
+    for call in calls:
+        print(
+            '{}:{}:{}: '.format(filename, call.line, call.column),
+            'replace {}() with {}'.format(call.name, BUILTIN_TYPES[call.name])
+        )
+    return int(bool(calls))
+
+
 def main(argv: Optional[Sequence[str]] = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*')
@@ -81,24 +99,16 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         action='store_false',
     )
     mutex.set_defaults(allow_dict_kwargs=True)
+    add_runner_arguments(parser)
 
     args = parser.parse_args(argv)
 
-    retc = 0
-    for filename in args.filenames:
-        calls = check_file(
-            filename,
-            ignore=args.ignore,
-            allow_dict_kwargs=args.allow_dict_kwargs,
-        )
-        if calls:
-            retc = retc or 1
-        for call in calls:
-            print(
-                '{}:{}:{}: '.format(filename, call.line, call.column),
-                'replace {}() with {}'.format(call.name, BUILTIN_TYPES[call.name])
-            )
-    return retc
+    check = functools.partial(
+        _check_filename,
+        ignore=args.ignore,
+        allow_dict_kwargs=args.allow_dict_kwargs,
+    )
+    return run_per_file(check, args.filenames, args, cacheable=True)
 
 
 if __name__ == '__main__':
@@ -5,6 +5,11 @@ from tokenize import tokenize as tokenize_tokenize
 from typing import Optional
 from typing import Sequence
 
+from python.timings import phase
+from python.util import add_runner_arguments
+from python.util import read_bytes
+from python.util import run_per_file
+
 NON_CODE_TOKENS = frozenset(
     (
         tokenize.COMMENT,
@@ -49,16 +54,16 @@ def check_docstring_first(src: bytes, filename: str = '<unknown>') -> int:
     return 0
 
 
+def check_file(filename: str) -> int:
+    source = read_bytes(filename)
+    with phase('check'):
+        return check_docstring_first(source, filename=filename)
+
+
 def main(argv: Optional[Sequence[str]] = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*')
+    add_runner_arguments(parser)
     args = parser.parse_args(argv)
 
-    retv = 0
-
-    for filename in args.filenames:
-        with open(filename, 'rb') as file_handler:
-            contents = file_handler.read()
-        retv |= check_docstring_first(contents, filename=filename)
-
-    return retv
+    return run_per_file(check_file, args.filenames, args, cacheable=True)
@@ -1,12 +1,16 @@
 import argparse
 import ast
 import sys
-import traceback
 from typing import List
 from typing import NamedTuple
 from typing import Optional
 from typing import Sequence
 
+from python.timings import phase
+from python.util import add_runner_arguments
+from python.util import read_bytes
+from python.util import run_per_file
+
 DEBUG_STATEMENTS = {'pdb', 'ipdb', 'pudb', 'q', 'rdb', 'rpdb', 'wdb'}
 
 
@@ -41,10 +45,12 @@ class DebugStatementParser(ast.NodeVisitor):
 
 
 def check_file(filename: str) -> int:
+    source = read_bytes(filename)
     try:
-        with open(filename, 'rb') as file_handler:
-            ast_obj = ast.parse(file_handler.read(), filename=filename)
+        with phase('parse'):
+            ast_obj = ast.parse(source, filename=filename)
     except SyntaxError:
+        import traceback  # pylint: disable=import-outside-toplevel
         print('{} - Could not parse ast'.format(filename))
         print()
         print('\t' + traceback.format_exc().replace('\n', '\n\t'))
@@ -52,7 +58,8 @@ def check_file(filename: str) -> int:
         return 1
 
     visitor = DebugStatementParser()
-    visitor.visit(ast_obj)
+    with phase('check'):
+        visitor.visit(ast_obj)
 
     for bkpt in visitor.breakpoints:
         print('{}:{}:{} - {} {}'.format(filename, bkpt.line, bkpt.col, bkpt.name, bkpt.reason))
@@ -63,12 +70,10 @@ def check_file(filename: str) -> int:
 def main(argv: Optional[Sequence[str]] = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*', help='Filenames to run')
+    add_runner_arguments(parser)
     args = parser.parse_args(argv)
 
-    retv = 0
-    for filename in args.filenames:
-        retv |= check_file(filename)
-    return retv
+    return run_per_file(check_file, args.filenames, args, cacheable=True)
 
 
 if __name__ == '__main__':
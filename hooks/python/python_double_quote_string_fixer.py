@@ -3,10 +3,16 @@ import io
 import re
 import sys
 import tokenize
+from typing import Callable
 from typing import List
 from typing import Optional
 from typing import Sequence
 
+from python.util import add_runner_arguments
+from python.util import read_bytes
+from python.util import run_per_file
+from python.util import write_bytes
+
 START_QUOTE_RE = re.compile('^[a-zA-Z]*"')
 
 
@@ -31,9 +37,8 @@ def get_line_offsets_by_line_no(src: str) -> List[int]:
     return offsets
 
 
-def fix_strings(filename: str) -> int:  # pylint: disable=too-many-locals
-    with open(filename, encoding='UTF-8', newline='') as file_handler:
-        contents = file_handler.read()
+def fix_quotes(source: bytes, filename: str = '') -> bytes:  # pylint: disable=unused-argument
+    contents = source.decode('UTF-8')
     line_offsets = get_line_offsets_by_line_no(contents)
 
     # Basically a mutable string
@@ -49,26 +54,43 @@ def fix_strings(filename: str) -> int:  # pylint: disable=too-many-locals
 
     new_contents = ''.join(splitcontents)
     if contents != new_contents:
-        with open(filename, 'w', encoding='UTF-8', newline='') as file_handler:
-            file_handler.write(new_contents)
+        return new_contents.encode('UTF-8')
+    return source
+
+
+def fix_strings(filename: str) -> int:
+    contents = read_bytes(filename)
+    new_contents = fix_quotes(contents)
+    if contents != new_contents:
+        write_bytes(filename, new_contents)
         return 1
     return 0
 
 
-def main(argv: Optional[Sequence[str]] = None) -> int:
+def _fix_filename(filename: str) -> int:
+    return_value = fix_strings(filename)
+    if return_value != 0:
+        print(f'Fixing strings in {filename}')
+    return return_value
+
+
+def _make_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*', help='Filenames to fix')
-    args = parser.parse_args(argv)
+    add_runner_arguments(parser)
+    return parser
+
 
-    retv = 0
+def build_stage(argv: Sequence[str]) -> Callable[[bytes, str], bytes]:
+    """Fix of the contents of a file, for generic-fix-pipeline."""
+    _make_parser().parse_args(argv)
+    return fix_quotes
 
-    for filename in args.filenames:
-        return_value = fix_strings(filename)
-        if return_value != 0:
-            print(f'Fixing strings in {filename}')
-        retv |= return_value
 
-    return retv
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = _make_parser().parse_args(argv)
+
+    return run_per_file(_fix_filename, args.filenames, args)
 
 
 if __name__ == '__main__':
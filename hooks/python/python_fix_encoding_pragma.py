@@ -1,10 +1,20 @@
 import argparse
+import functools
+import io
 import sys
+from typing import Callable
 from typing import IO
 from typing import NamedTuple
 from typing import Optional
 from typing import Sequence
 
+from python.util import add_runner_arguments
+from python.util import Header
+from python.util import probe_header
+from python.util import read_bytes
+from python.util import run_per_file
+from python.util import write_bytes
+
 DEFAULT_PRAGMA = b'# -*- coding: utf-8 -*-'
 
 
@@ -107,7 +117,49 @@ def _normalize_pragma(pragma: str) -> bytes:
     return pragma.encode().rstrip()
 
 
-def main(argv: Optional[Sequence[str]] = None) -> int:
+def fix_contents(
+    contents: bytes,
+    filename: str,  # pylint: disable=unused-argument
+    remove: bool,
+    expected_pragma: bytes,
+) -> bytes:
+    file_handler = io.BytesIO(contents)
+    fix_encoding_pragma(file_handler, remove=remove, expected_pragma=expected_pragma)
+    return file_handler.getvalue()
+
+
+def _needs_no_fix(header: Header, remove: bool, expected_pragma: bytes) -> bool:
+    """Whether a file is known to need no fix from its header alone."""
+    file_handler = io.BytesIO(header.prefix)
+    first_line, second_line = file_handler.readline(), file_handler.readline()
+    if not header.is_whole and not second_line.endswith(b'\n'):
+        return False
+    expected = _get_expected_contents(
+        first_line,
+        second_line,
+        file_handler.read(),
+        expected_pragma,
+    )
+    # With only blank lines after the pragma, the whole file decides
+    return bool(expected.rest.strip()) and expected.is_expected_pragma(remove)
+
+
+def _fix_filename(filename: str, remove: bool, expected_pragma: bytes, fmt: str) -> int:
+    if _needs_no_fix(probe_header(filename), remove, expected_pragma):
+        return 0
+    file_handler = io.BytesIO(read_bytes(filename))
+    file_ret = fix_encoding_pragma(
+        file_handler,
+        remove=remove,
+        expected_pragma=expected_pragma,
+    )
+    if file_ret:
+        write_bytes(filename, file_handler.getvalue())
+        print(fmt.format(pragma=expected_pragma.decode(), filename=filename))
+    return file_ret
+
+
+def _make_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser('Fixes the encoding pragma of python files', )
     parser.add_argument('filenames', nargs='*', help='Filenames to fix')
     parser.add_argument(
@@ -122,27 +174,31 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         action='store_true',
         help='Remove the encoding pragma (Useful in a python3-only codebase)',
     )
-    args = parser.parse_args(argv)
+    add_runner_arguments(parser)
+    return parser
 
-    retv = 0
+
+def build_stage(argv: Sequence[str]) -> Callable[[bytes, str], bytes]:
+    """Fix of the contents of a file, for generic-fix-pipeline."""
+    args = _make_parser().parse_args(argv)
+    return functools.partial(fix_contents, remove=args.remove, expected_pragma=args.pragma)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = _make_parser().parse_args(argv)
 
     if args.remove:
         fmt = 'Removed encoding pragma from {filename}'
     else:
         fmt = 'Added `{pragma}` to {filename}'
 
-    for filename in args.filenames:
-        with open(filename, 'r+b') as file_handler:
-            file_ret = fix_encoding_pragma(
-                file_handler,
-                remove=args.remove,
-                expected_pragma=args.pragma,
-            )
-            retv |= file_ret
-            if file_ret:
-                print(fmt.format(pragma=args.pragma.decode(), filename=filename))
-
-    return retv
+    fix = functools.partial(
+        _fix_filename,
+        remove=args.remove,
+        expected_pragma=args.pragma,
+        fmt=fmt,
+    )
+    return run_per_file(fix, args.filenames, args)
 
 
 if __name__ == '__main__':
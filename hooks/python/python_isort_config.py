@@ -1,6 +1,8 @@
 from pathlib import Path
 import sys
 
+from python.timings import timed
+
 CONFIG_PATH = Path('.isort.cfg')
 DEFAULT_CONTENT = \
 r'''[settings]
@@ -12,6 +14,7 @@ line_length = 99
 '''
 
 
+@timed
 def main():
     if not CONFIG_PATH.exists():
         with CONFIG_PATH.open('w') as cfg_fh:
@@ -1,6 +1,8 @@
 from pathlib import Path
 import sys
 
+from python.timings import timed
+
 CONFIG_PATH = Path('.pylintrc')
 DEFAULT_CONTENT = \
 r'''[MASTER]
@@ -526,6 +528,7 @@ overgeneral-exceptions=BaseException,
 '''
 
 
+@timed
 def main():
     if not CONFIG_PATH.exists():
         with CONFIG_PATH.open('w') as cfg_fh:
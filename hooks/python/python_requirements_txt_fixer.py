@@ -1,10 +1,17 @@
 import argparse
+import io
 import sys
+from typing import Callable
 from typing import IO
 from typing import List
 from typing import Optional
 from typing import Sequence
 
+from python.util import add_runner_arguments
+from python.util import read_bytes
+from python.util import run_per_file
+from python.util import write_bytes
+
 PASS = 0
 FAIL = 1
 
@@ -100,23 +107,40 @@ def fix_requirements(file: IO[bytes]) -> int:  # pylint: disable=too-many-branch
     return FAIL
 
 
-def main(argv: Optional[Sequence[str]] = None) -> int:
+def fix_contents(contents: bytes, filename: str = '') -> bytes:  # pylint: disable=unused-argument
+    file_obj = io.BytesIO(contents)
+    fix_requirements(file_obj)
+    return file_obj.getvalue()
+
+
+def _fix_filename(filename: str) -> int:
+    file_obj = io.BytesIO(read_bytes(filename))
+    ret_for_file = fix_requirements(file_obj)
+
+    if ret_for_file:
+        write_bytes(filename, file_obj.getvalue())
+        print(f'Sorting {filename}')
+
+    return ret_for_file
+
+
+def _make_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*', help='Filenames to fix')
-    args = parser.parse_args(argv)
+    add_runner_arguments(parser)
+    return parser
 
-    retv = PASS
 
-    for arg in args.filenames:
-        with open(arg, 'rb+') as file_obj:
-            ret_for_file = fix_requirements(file_obj)
+def build_stage(argv: Sequence[str]) -> Callable[[bytes, str], bytes]:
+    """Fix of the contents of a file, for generic-fix-pipeline."""
+    _make_parser().parse_args(argv)
+    return fix_contents
 
-            if ret_for_file:
-                print(f'Sorting {arg}')
 
-            retv |= ret_for_file
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = _make_parser().parse_args(argv)
 
-    return retv
+    return run_per_file(_fix_filename, args.filenames, args)
 
 
 if __name__ == '__main__':
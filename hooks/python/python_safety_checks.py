@@ -2,7 +2,10 @@ from __future__ import print_function
 import sys
 from safety.cli import check
 
+from python.timings import timed
 
+
+@timed
 def main(argv):
     try:
         check.main(['--full-report'] + sum((['-r', f] for f in argv), []))
@@ -0,0 +1,194 @@
+"""Persistent record of the files which passed a hook.
+
+Entries are keyed by the blob id of the file contents, the hook, a hash of
+the source code of the hook and of the helper modules it uses, of the
+versions of the parsers it depends on, and the hook arguments, so any
+change to one of them makes the file checked again.  Hooks which treat files
+differently depending on their extension add it to the key.  Only passes are
+recorded: failures are always reported again.  The cache lives in the git
+directory and keeps the `MAX_ENTRIES` most recently used entries.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+
+from python.timings import hook_id
+from python.util import blob_sha
+from python.util import CalledProcessError
+from python.util import git_dir
+
+CACHE_FILENAME = 'pch-result-cache.sqlite'
+MAX_ENTRIES = int(os.environ.get('PCH_CACHE_MAX_ENTRIES', 200000))
+# Arguments which do not change the verdict of a hook
+RUNNER_ARGS = frozenset(('filenames', 'no_cache', 'jobs', 'timings'))
+# Imports of the modules of this package, including the ones inside functions
+_IMPORT = re.compile(
+    br'^[ \t]*(?:from|import)[ \t]+python(?:\.(\w+)|[ \t]+import[ \t]+(\w+))', re.MULTILINE
+)
+# Third-party distributions whose version can change the verdict of a hook
+DISTRIBUTIONS = {
+    'python.html_validate': ('html5validator', 'jinja2', 'pybars3'),
+    'python.rst_linter': ('docutils', 'readme_renderer'),
+    'python.toml_check_syntax': ('toml', ),
+    'python.yaml_check_syntax': ('ruamel.yaml', ),
+}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if isinstance(value, bytes):
+        return value.decode('latin-1')
+    return repr(value)
+
+
+def normalize_args(args: argparse.Namespace) -> str:
+    options = {key: value for key, value in vars(args).items() if key not in RUNNER_ARGS}
+    return json.dumps(options, sort_keys=True, default=_json_default)
+
+
+def _module_source(name: str) -> bytes:
+    """Source of a module, which is not imported if it was not yet."""
+    import importlib.util  # pylint: disable=import-outside-toplevel
+    module_file = getattr(sys.modules.get(name), '__file__', None)
+    if module_file is None:
+        spec = importlib.util.find_spec(name)
+        module_file = spec.origin if spec is not None else None
+    if module_file is None:
+        return b''
+    with open(module_file, 'rb') as file_handler:
+        return file_handler.read()
+
+
+def module_sources(module_name: str) -> Dict[str, bytes]:
+    """Source of `module_name` and of the modules of this package it imports, directly or not."""
+    sources: Dict[str, bytes] = {}
+    pending = [module_name]
+    while pending:
+        name = pending.pop()
+        if name in sources:
+            continue
+        sources[name] = _module_source(name)
+        pending.extend(
+            'python.' + (submodule or imported).decode()
+            for submodule, imported in _IMPORT.findall(sources[name])
+        )
+    return sources
+
+
+def distribution_version(name: str) -> str:
+    import importlib.metadata  # pylint: disable=import-outside-toplevel
+    try:
+        return importlib.metadata.version(name)
+    except importlib.metadata.PackageNotFoundError:
+        return 'missing'
+
+
+def hook_version(module_name: str) -> str:
+    """Hash of the source code of the hook and of its helpers, and of the versions it uses."""
+    sha = hashlib.sha1(sys.version.encode())
+    for _, source in sorted(module_sources(module_name).items()):
+        sha.update(source)
+    for distribution in DISTRIBUTIONS.get(module_name, ()):
+        sha.update('\0{}={}'.format(distribution, distribution_version(distribution)).encode())
+    return sha.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, path: str, hook_id: str, version: str, args: str) -> None:
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        with self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS passes (key TEXT PRIMARY KEY, used INTEGER NOT NULL)'
+            )
+            self.connection.execute('CREATE INDEX IF NOT EXISTS passes_used ON passes (used)')
+        self.prefix = hashlib.sha1('\0'.join((hook_id, version, args)).encode()).hexdigest()
+        self.used: List[str] = []
+        self.passed: List[str] = []
+
+    @classmethod
+    def for_hook(
+        cls,
+        check: Callable[..., Any],
+        args: argparse.Namespace,
+    ) -> Optional['ResultCache']:
+        """Cache for the hook defining `check`, None outside of a git repository."""
+        module_name = getattr(check, 'func', check).__module__
+        try:
+            path = os.path.join(git_dir(), CACHE_FILENAME)
+            return cls(path, hook_id(check), hook_version(module_name), normalize_args(args))
+        except (CalledProcessError, OSError, sqlite3.Error):
+            return None
+
+    def key(self, contents: bytes, extension: str = '') -> str:
+        return '{}:{}{}'.format(self.prefix, extension, blob_sha(contents))
+
+    def knows(self, key: str) -> bool:
+        """Whether a file with this key is known to pass."""
+        try:
+            cursor = self.connection.execute('SELECT 1 FROM passes WHERE key = ?', (key, ))
+            found = cursor.fetchone()
+        except sqlite3.Error:
+            return False
+        if found:
+            self.used.append(key)
+        return bool(found)
+
+    def unknown(
+        self,
+        filenames: Iterable[str],
+        read: Callable[[str], bytes],
+        by_extension: bool = False,
+    ) -> Dict[str, str]:
+        """Map each filename not known to pass to its cache key.
+
+        With `by_extension`, the extension of a file is part of its key.
+        """
+        keys = {
+            filename: self.key(
+                read(filename),
+                os.path.splitext(filename)[1] + ':' if by_extension else '',
+            )
+            for filename in filenames
+        }
+        return {filename: key for filename, key in keys.items() if not self.knows(key)}
+
+    def add(self, keys: Iterable[str]) -> None:
+        """Record passes, written on close()."""
+        self.passed.extend(keys)
+
+    def close(self) -> None:
+        now = time.time_ns()
+        try:
+            with self.connection:
+                self.connection.executemany(
+                    'INSERT OR REPLACE INTO passes (key, used) VALUES (?, ?)',
+                    ((key, now) for key in self.used + self.passed),
+                )
+                self._evict()
+        except sqlite3.Error:
+            pass
+        finally:
+            self.connection.close()
+
+    def _evict(self) -> None:
+        count, = self.connection.execute('SELECT COUNT(*) FROM passes').fetchone()
+        if count > MAX_ENTRIES:
+            self.connection.execute(
+                'DELETE FROM passes WHERE rowid IN '
+                '(SELECT rowid FROM passes ORDER BY used LIMIT ?)',
+                (count - MAX_ENTRIES, ),
+            )
@@ -4,21 +4,28 @@ import argparse, io, sys
 
 from readme_renderer.rst import publish_parts, ReadMeHTMLTranslator, SETTINGS, SystemMessage, Writer
 
+from python.timings import phase
+from python.util import add_runner_arguments
+from python.util import read_text
+from python.util import run_per_file
+
 
 def main(argv=None):
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*', help='filenames to check')
+    add_runner_arguments(parser)
     args = parser.parse_args(argv)
 
-    errors_found = False
-    for filename in args.filenames:
-        linter_error = get_linter_error(filename)
-        if linter_error:
-            errors_found = True
-            print('Syntax error found in ', filename, file=sys.stderr)
-            print(linter_error, file=sys.stderr)
+    return run_per_file(check_file, args.filenames, args, cacheable=True)
+
 
-    return 1 if errors_found else 0
+def check_file(filename):
+    linter_error = get_linter_error(filename)
+    if linter_error:
+        print('Syntax error found in ', filename, file=sys.stderr)
+        print(linter_error, file=sys.stderr)
+        return 1
+    return 0
 
 
 def get_linter_error(filename):
@@ -30,11 +37,11 @@ def get_linter_error(filename):
     writer = Writer()
     writer.translator_class = ReadMeHTMLTranslator
 
-    with open(filename) as rst_content:
-        raw = rst_content.read()
+    raw = read_text(filename)
 
     try:
-        publish_parts(raw, writer=writer, settings_overrides=settings).get('fragment')
+        with phase('parse'):
+            publish_parts(raw, writer=writer, settings_overrides=settings).get('fragment')
         return False
     except SystemMessage:
         return output.getvalue()
@@ -0,0 +1,170 @@
+"""Per-hook, per-file and per-phase timing and memory records.
+
+Recording is enabled by the `--timings FILE` option of the per-file hooks, or
+for every hook by the `PCH_TIMINGS=FILE` environment variable.  Each span is
+written as a JSON line to FILE and as a Chrome trace event to FILE.trace.json,
+which can be opened with chrome://tracing or https://ui.perfetto.dev.  Several
+hooks, possibly running in parallel, can append to the same files.
+
+Spans are nested: a hook span contains one span per file, which contains the
+phases (read, parse, check, write) reported by the hook.  `peak_bytes` is the
+peak of the memory allocated by Python during the span, as seen by
+tracemalloc, which slows down the hooks noticeably.
+"""
+from __future__ import annotations
+
+import contextlib
+import functools
+import os
+import sys
+import time
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any
+    from typing import Callable
+    from typing import Dict
+    from typing import Iterator
+    from typing import List
+    from typing import Optional
+
+ENV_VAR = 'PCH_TIMINGS'
+TRACE_SUFFIX = '.trace.json'
+
+_RECORDER: Optional[Recorder] = None
+
+
+class Recorder:
+    def __init__(self, path: str) -> None:
+        import tracemalloc  # pylint: disable=import-outside-toplevel
+        self.tracemalloc = tracemalloc
+        self.path = path
+        self.trace_path = path + TRACE_SUFFIX
+        self.records: List[Dict[str, Any]] = []
+        # [hook, file, phase, wall start, cpu start, peak of the children]
+        self.stack: List[List[Any]] = []
+        tracemalloc.start()
+        # Workers of a process pool record and flush their own spans
+        os.register_at_fork(after_in_child=self._forget)
+
+    def _forget(self) -> None:
+        self.records = []
+        self.stack = []
+
+    def start(self, hook: str, filename: str, phase: str) -> None:
+        if self.stack:
+            parent = self.stack[-1]
+            parent[5] = max(parent[5], self.tracemalloc.get_traced_memory()[1])
+        self.tracemalloc.reset_peak()
+        self.stack.append([hook, filename, phase, time.time(), time.process_time(), 0])
+
+    def stop(self) -> None:
+        hook, filename, phase, wall_start, cpu_start, children_peak = self.stack.pop()
+        peak = max(children_peak, self.tracemalloc.get_traced_memory()[1])
+        if self.stack:
+            self.stack[-1][5] = max(self.stack[-1][5], peak)
+        self.records.append(
+            {
+                'hook': hook,
+                'file': filename,
+                'phase': phase,
+                'start': wall_start,
+                'wall_s': time.time() - wall_start,
+                'cpu_s': time.process_time() - cpu_start,
+                'peak_bytes': peak,
+                'pid': os.getpid(),
+            }
+        )
+        if not self.stack:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.records:
+            return
+        import json  # pylint: disable=import-outside-toplevel
+        lines = ''.join(json.dumps(record) + '\n' for record in self.records)
+        events = ''.join(json.dumps(_trace_event(record)) + ',\n' for record in self.records)
+        self.records = []
+        _append(self.path, lines)
+        try:
+            # The closing bracket is optional in the JSON array trace format
+            with open(self.trace_path, 'x') as trace:
+                trace.write('[\n' + events)
+        except FileExistsError:
+            _append(self.trace_path, events)
+
+
+def _append(path: str, data: str) -> None:
+    # A single write on a file opened with O_APPEND does not interleave
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, data.encode())
+    finally:
+        os.close(fd)
+
+
+def _trace_event(record: Dict[str, Any]) -> Dict[str, Any]:
+    names = {'hook': record['hook'], 'file': record['file']}
+    return {
+        'name': names.get(record['phase'], record['phase']),
+        'cat': record['hook'],
+        'ph': 'X',
+        'ts': record['start'] * 1e6,
+        'dur': record['wall_s'] * 1e6,
+        'pid': record['pid'],
+        'tid': record['pid'],
+        'args': {
+            'file': record['file'],
+            'cpu_s': record['cpu_s'],
+            'peak_bytes': record['peak_bytes'],
+        },
+    }
+
+
+def enable(path: Optional[str]) -> None:
+    """Start recording to `path`, if given and not already recording."""
+    global _RECORDER  # pylint: disable=global-statement
+    if path and _RECORDER is None:
+        _RECORDER = Recorder(path)
+
+
+@contextlib.contextmanager
+def span(hook: str, filename: str, phase: str) -> Iterator[None]:
+    if _RECORDER is None:
+        yield
+        return
+    _RECORDER.start(hook, filename, phase)
+    try:
+        yield
+    finally:
+        _RECORDER.stop()
+
+
+@contextlib.contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time a step of the check of the current file."""
+    if _RECORDER is None or not _RECORDER.stack:
+        yield
+        return
+    hook, filename = _RECORDER.stack[-1][:2]
+    with span(hook, filename, name):
+        yield
+
+
+def hook_id(function: Callable[..., Any]) -> str:
+    """Console script name of the hook defining `function`."""
+    module_name = getattr(function, 'func', function).__module__
+    if module_name == '__main__':
+        module_name = os.path.splitext(os.path.basename(sys.argv[0]))[0]
+    return module_name.rpartition('.')[-1].replace('_', '-')
+
+
+def timed(main: Callable[..., Any]) -> Callable[..., Any]:
+    """Record the whole run of a hook when PCH_TIMINGS is set."""
+    @functools.wraps(main)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        enable(os.environ.get(ENV_VAR))
+        with span(hook_id(main), '', 'hook'):
+            return main(*args, **kwargs)
+
+    return wrapper
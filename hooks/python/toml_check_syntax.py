@@ -5,21 +5,30 @@ from typing import Sequence
 
 import toml
 
+from python.timings import phase
+from python.util import add_runner_arguments
+from python.util import read_text
+from python.util import run_per_file
+
+
+def check_file(filename: str) -> int:
+    contents = read_text(filename)
+    try:
+        with phase('parse'):
+            toml.loads(contents)
+    except toml.TomlDecodeError as exc:
+        print('{}: {}'.format(filename, exc))
+        return 1
+    return 0
+
 
 def main(argv: Optional[Sequence[str]] = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*', help='Filenames to check.')
+    add_runner_arguments(parser)
     args = parser.parse_args(argv)
 
-    retval = 0
-    for filename in args.filenames:
-        try:
-            with open(filename) as file_handler:
-                toml.load(file_handler)
-        except toml.TomlDecodeError as exc:
-            print('{}: {}'.format(filename, exc))
-            retval = 1
-    return retval
+    return run_per_file(check_file, args.filenames, args, cacheable=True)
 
 
 if __name__ == '__main__':
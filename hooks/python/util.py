@@ -1,7 +1,42 @@
-import subprocess
-from typing import Any
-from typing import Optional
-from typing import Set
+from __future__ import annotations
+
+import argparse
+import collections
+import contextlib
+import functools
+import io
+import os
+import sys
+
+from python import timings
+
+# Every hook imports this module: keep typing, subprocess and hashlib off the
+# startup path of the hooks which do not need them
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any
+    from typing import Callable
+    from typing import Dict
+    from typing import IO
+    from typing import Iterable
+    from typing import Iterator
+    from typing import List
+    from typing import Optional
+    from typing import Sequence
+    from typing import Set
+    from typing import Tuple
+
+# filename -> contents, only populated while a shared view is active
+_SHARED_VIEW: Optional[Dict[str, bytes]] = None
+# filename -> Header, probed once per file while a shared view is active
+_SHARED_HEADERS: Dict[str, Header] = {}
+# Total size of the contents held by the shared view, and its limit
+_SHARED_VIEW_SIZE = 0
+_SHARED_VIEW_MAX_BYTES = 0
+SHARED_VIEW_MAX_BYTES = 256 * 1024 * 1024
+
+
+EMPTY_TREE = '4b825dc642cb6eb9a060e54bf8d69288fbee4904'
 
 
 class CalledProcessError(RuntimeError):
@@ -13,7 +48,38 @@ def added_files() -> Set[str]:
     return set(cmd_output(*cmd).splitlines())
 
 
+StagedEntry = collections.namedtuple('StagedEntry', ('mode', 'oid'))
+
+
+def staged_entries(filenames: Sequence[str]) -> Dict[str, StagedEntry]:
+    """Staged mode (e.g. '100755' or '120000') and blob id of each file, by normalized path.
+
+    Files which are not staged are missing, as are all files outside of a
+    git work tree.
+    """
+    if not filenames:
+        return {}
+    cmd = ('git', '--literal-pathspecs', 'ls-files', '--stage', '-z', '--')
+    try:
+        output = cmd_output(*cmd, *filenames)
+    except (CalledProcessError, OSError):
+        return {}
+    entries = {}
+    for entry in output.split('\0'):
+        if entry:
+            info, _, path = entry.partition('\t')
+            mode, oid, _ = info.split(' ', 2)
+            entries[path] = StagedEntry(mode, oid)
+    return entries
+
+
+def staged_modes(filenames: Sequence[str]) -> Dict[str, str]:
+    """Staged mode of each file, as given by staged_entries()."""
+    return {path: entry.mode for path, entry in staged_entries(filenames).items()}
+
+
 def cmd_output(*cmd: str, retcode: Optional[int] = 0, **kwargs: Any) -> str:
+    import subprocess  # pylint: disable=import-outside-toplevel
     kwargs.setdefault('stdout', subprocess.PIPE)
     kwargs.setdefault('stderr', subprocess.PIPE)
     proc = subprocess.Popen(cmd, **kwargs)
@@ -22,3 +88,408 @@ def cmd_output(*cmd: str, retcode: Optional[int] = 0, **kwargs: Any) -> str:
     if retcode is not None and proc.returncode != retcode:
         raise CalledProcessError(cmd, retcode, proc.returncode, stdout, stderr)
     return stdout
+
+
+def head_tree() -> str:
+    """Tree of HEAD, the empty tree before the first commit."""
+    try:
+        return cmd_output('git', 'rev-parse', '--verify', '-q', 'HEAD^{tree}').rstrip('\n')
+    except CalledProcessError:
+        return EMPTY_TREE
+
+
+@functools.lru_cache(maxsize=None)
+def git_dir() -> str:
+    return os.path.abspath(cmd_output('git', 'rev-parse', '--git-dir').rstrip('\n'))
+
+
+ObjectInfo = collections.namedtuple('ObjectInfo', ('oid', 'type', 'size'))
+
+
+class GitCatFile:
+    """Long-lived `git cat-file --batch-check` and `--batch` processes.
+
+    Objects are named as `git rev-parse` understands them, e.g. `:path` for
+    the staged version of a file (relative to the top of the work tree).
+    Names must not contain newlines.  Use git_cat_file() to share one
+    instance per hook process.
+    """
+
+    def __init__(self) -> None:
+        self.processes: Dict[str, Any] = {}
+
+    def _process(self, mode: str) -> Any:
+        proc = self.processes.get(mode)
+        if proc is None:
+            import subprocess  # pylint: disable=import-outside-toplevel
+            proc = subprocess.Popen(
+                ('git', 'cat-file', mode),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+            )
+            self.processes[mode] = proc
+        return proc
+
+    @staticmethod
+    def _read_info(proc: Any) -> Optional[ObjectInfo]:
+        line = proc.stdout.readline()
+        if not line:
+            raise CalledProcessError(proc.args, 0, proc.wait(), '', '')
+        fields = line.rstrip(b'\n').rsplit(b' ', 2)
+        if not fields[-1].isdigit():  # '<name> missing' or '<name> ambiguous'
+            return None
+        oid, object_type, size = fields
+        return ObjectInfo(oid.decode(), object_type.decode(), int(size))
+
+    def infos(self, names: Iterable[str]) -> List[Optional[ObjectInfo]]:
+        """Id, type and size of each object, None for those which do not exist."""
+        import threading  # pylint: disable=import-outside-toplevel
+        names = list(names)
+        proc = self._process('--batch-check')
+        request = b''.join(os.fsencode(name) + b'\n' for name in names)
+
+        def write() -> None:
+            # If git died, the reader reports it
+            with contextlib.suppress(BrokenPipeError):
+                proc.stdin.write(request)
+                proc.stdin.flush()
+
+        # Answers are read while the queries are written, so that neither
+        # process blocks on a full pipe
+        writer = threading.Thread(target=write, daemon=True)
+        writer.start()
+        try:
+            return [self._read_info(proc) for _ in names]
+        finally:
+            writer.join()
+
+    def info(self, name: str) -> Optional[ObjectInfo]:
+        return self.infos((name, ))[0]
+
+    def _request(self, name: str) -> Any:
+        proc = self._process('--batch')
+        with contextlib.suppress(BrokenPipeError):
+            proc.stdin.write(os.fsencode(name) + b'\n')
+            proc.stdin.flush()
+        return proc
+
+    def contents(self, name: str) -> Optional[bytes]:
+        """Contents of an object, None if it does not exist."""
+        proc = self._request(name)
+        info = self._read_info(proc)
+        if info is None:
+            return None
+        contents = proc.stdout.read(info.size + 1)[:-1]  # followed by a newline
+        if len(contents) != info.size:
+            raise CalledProcessError(proc.args, 0, proc.wait(), '', '')
+        return contents
+
+    def head(self, name: str, size: int) -> Optional[bytes]:
+        """First `size` bytes of an object, None if it does not exist.
+
+        The rest of the object is skipped in bounded chunks.
+        """
+        proc = self._request(name)
+        info = self._read_info(proc)
+        if info is None:
+            return None
+        head = proc.stdout.read(min(size, info.size))
+        remaining = info.size - len(head) + 1  # followed by a newline
+        while remaining:
+            skipped = len(proc.stdout.read(min(remaining, 1024 * 1024)))
+            if not skipped:
+                raise CalledProcessError(proc.args, 0, proc.wait(), '', '')
+            remaining -= skipped
+        return head
+
+    def close(self) -> None:
+        for proc in self.processes.values():
+            with contextlib.suppress(BrokenPipeError):
+                proc.stdin.close()
+            proc.wait()
+        self.processes.clear()
+
+
+@functools.lru_cache(maxsize=None)
+def git_cat_file() -> GitCatFile:
+    """cat-file processes shared by the whole hook run, stopped at exit."""
+    import atexit  # pylint: disable=import-outside-toplevel
+    cat_file = GitCatFile()
+    atexit.register(cat_file.close)
+    return cat_file
+
+
+def blob_sha(contents: bytes) -> str:
+    """Object id git would give to a blob with these contents."""
+    import hashlib  # pylint: disable=import-outside-toplevel
+    sha = hashlib.sha1(b'blob %d\0' % len(contents))
+    sha.update(contents)
+    return sha.hexdigest()
+
+
+@contextlib.contextmanager
+def shared_view(max_bytes: int = SHARED_VIEW_MAX_BYTES) -> Iterator[None]:
+    """Serve every read of a file from memory until the block exits.
+
+    Nested blocks reuse the outermost view, so a runner can keep the
+    contents of a file alive across several hooks.  Files which would take
+    the view over `max_bytes` are read from disk each time instead.
+    """
+    # pylint: disable=global-statement
+    global _SHARED_VIEW, _SHARED_VIEW_SIZE, _SHARED_VIEW_MAX_BYTES
+    if _SHARED_VIEW is not None:
+        yield
+        return
+    _SHARED_VIEW = {}
+    _SHARED_VIEW_SIZE = 0
+    _SHARED_VIEW_MAX_BYTES = max_bytes
+    try:
+        yield
+    finally:
+        _SHARED_VIEW = None
+        _SHARED_HEADERS.clear()
+
+
+def _remember(filename: str, contents: bytes) -> None:
+    """Keep the contents of a file in the shared view, if any and if they fit."""
+    global _SHARED_VIEW_SIZE  # pylint: disable=global-statement
+    if _SHARED_VIEW is None:
+        return
+    forget_contents(filename)
+    if _SHARED_VIEW_SIZE + len(contents) <= _SHARED_VIEW_MAX_BYTES:
+        _SHARED_VIEW[filename] = contents
+        _SHARED_VIEW_SIZE += len(contents)
+
+
+def read_bytes(filename: str) -> bytes:
+    if _SHARED_VIEW is not None and filename in _SHARED_VIEW:
+        return _SHARED_VIEW[filename]
+    with timings.phase('read'), open(filename, 'rb') as file_handler:
+        contents = file_handler.read()
+    _remember(filename, contents)
+    return contents
+
+
+def open_bytes(filename: str) -> IO[bytes]:
+    """Binary file object reading `filename`, from the shared view if it holds it."""
+    if _SHARED_VIEW is not None and filename in _SHARED_VIEW:
+        return io.BytesIO(_SHARED_VIEW[filename])
+    return open(filename, 'rb')
+
+
+HEADER_SIZE = 1024
+BOM = b'\xef\xbb\xbf'
+
+# prefix: the first HEADER_SIZE bytes, the whole file when is_whole
+# shebang: first line without its end-line when it starts with #!, else b''
+Header = collections.namedtuple('Header', ('prefix', 'is_whole', 'bom', 'shebang'))
+
+
+def count_line_endings(contents: bytes) -> Dict[bytes, int]:
+    """Number of LF, CRLF and bare CR end-lines, counted in C without splitting lines."""
+    carriage_returns = contents.count(b'\r')
+    crlf = contents.count(b'\r\n') if carriage_returns else 0
+    return {
+        b'\n': contents.count(b'\n') - crlf,
+        b'\r\n': crlf,
+        b'\r': carriage_returns - crlf,
+    }
+
+
+def probe_contents(prefix: bytes, is_whole: bool = False) -> Header:
+    """Header of a file starting with `prefix`."""
+    first_line = prefix.splitlines()[0] if prefix else b''
+    return Header(
+        prefix=prefix,
+        is_whole=is_whole,
+        bom=prefix.startswith(BOM),
+        shebang=first_line if first_line.startswith(b'#!') else b'',
+    )
+
+
+def probe_header(filename: str) -> Header:
+    """BOM and shebang of the start of a file.
+
+    Only HEADER_SIZE bytes are read, from the shared view if it holds the
+    file, and the header is probed once per file while a shared view is
+    active.
+    """
+    header = _SHARED_HEADERS.get(filename)
+    if header is not None:
+        return header
+    with timings.phase('read'), open_bytes(filename) as file_handler:
+        prefix = file_handler.read(HEADER_SIZE + 1)
+    header = probe_contents(prefix[:HEADER_SIZE], len(prefix) <= HEADER_SIZE)
+    if _SHARED_VIEW is not None:
+        _SHARED_HEADERS[filename] = header
+    return header
+
+
+def forget_contents(filename: str) -> None:
+    """Drop a file from the shared view, if any, e.g. when it changed on disk."""
+    global _SHARED_VIEW_SIZE  # pylint: disable=global-statement
+    _SHARED_HEADERS.pop(filename, None)
+    if _SHARED_VIEW is not None and filename in _SHARED_VIEW:
+        _SHARED_VIEW_SIZE -= len(_SHARED_VIEW.pop(filename))
+
+
+def decode_text(contents: bytes, encoding: str = 'UTF-8') -> str:
+    # Same newline translation as open(filename) in text mode
+    return contents.decode(encoding).replace('\r\n', '\n').replace('\r', '\n')
+
+
+def read_text(filename: str, encoding: str = 'UTF-8') -> str:
+    return decode_text(read_bytes(filename), encoding)
+
+
+def write_bytes(filename: str, contents: bytes) -> None:
+    with timings.phase('write'), open(filename, 'wb') as file_handler:
+        file_handler.write(contents)
+    _remember(filename, contents)
+
+
+@contextlib.contextmanager
+def atomic_writer(filename: str) -> Iterator[IO[bytes]]:
+    """Binary file which replaces `filename` when the block exits without error.
+
+    It is a temporary file in the same directory, renamed over `filename`
+    with the permissions of `filename`: readers see either the old or the new
+    contents, never a partial write.  On error, `filename` is left untouched.
+    """
+    import tempfile  # pylint: disable=import-outside-toplevel
+    directory, basename = os.path.split(filename)
+    mode = os.stat(filename).st_mode & 0o7777
+    fd, tmp_filename = tempfile.mkstemp(prefix='.{}.'.format(basename), dir=directory or '.')
+    try:
+        with os.fdopen(fd, 'wb') as file_handler:
+            yield file_handler
+        os.chmod(tmp_filename, mode)
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        os.unlink(tmp_filename)
+        raise
+    forget_contents(filename)
+
+
+def replace_bytes(filename: str, contents: bytes) -> None:
+    """Atomically replace a file, keeping its permissions."""
+    with timings.phase('write'), atomic_writer(filename) as file_handler:
+        file_handler.write(contents)
+    _remember(filename, contents)
+
+
+def add_runner_arguments(parser: argparse.ArgumentParser) -> None:
+    """Options understood by run_per_file()."""
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        default=bool(os.environ.get('PCH_NO_CACHE')),
+        help='Check every file, even those known to pass from a previous run',
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        # A string default goes through `type`, so a bad PCH_JOBS is a usage error
+        default=os.environ.get('PCH_JOBS', '1'),
+        metavar='N',
+        help='Number of processes checking files in parallel, 0 for one per CPU (default: 1)',
+    )
+    parser.add_argument(
+        '--timings',
+        default=os.environ.get(timings.ENV_VAR),
+        metavar='FILE',
+        help='Append time and memory used per file to FILE (JSON lines) and FILE.trace.json',
+    )
+
+
+def _check_captured(check: Callable[[str], int], filename: str) -> Tuple[int, bytes, bytes]:
+    stdout = io.TextIOWrapper(io.BytesIO(), encoding=sys.stdout.encoding, write_through=True)
+    stderr = io.TextIOWrapper(io.BytesIO(), encoding=sys.stderr.encoding, write_through=True)
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        with timings.span(timings.hook_id(check), filename, 'file'):
+            ret = check(filename)
+    return ret, stdout.buffer.getvalue(), stderr.buffer.getvalue()  # type: ignore
+
+
+def _write_captured(stream: IO[str], output: bytes) -> None:
+    if not output:
+        return
+    stream.flush()
+    if hasattr(stream, 'buffer'):
+        stream.buffer.write(output)  # type: ignore
+        stream.buffer.flush()  # type: ignore
+    else:
+        stream.write(output.decode(stream.encoding or 'UTF-8', 'replace'))
+
+
+def _check_in_pool(
+    check: Callable[[str], int],
+    filenames: Sequence[str],
+    jobs: int,
+) -> Iterator[int]:
+    """Run `check` in worker processes, output is replayed in the order of `filenames`."""
+    # pylint: disable=import-outside-toplevel
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = max(1, len(filenames) // (jobs * 4))
+    with ProcessPoolExecutor(jobs) as executor:
+        results = executor.map(
+            functools.partial(_check_captured, check),
+            filenames,
+            chunksize=chunksize,
+        )
+        for ret, stdout, stderr in results:
+            _write_captured(sys.stdout, stdout)
+            _write_captured(sys.stderr, stderr)
+            yield ret
+
+    # Workers may have rewritten files behind the back of the shared view
+    for filename in filenames:
+        forget_contents(filename)
+
+
+def run_per_file(
+    check: Callable[[str], int],
+    filenames: Sequence[str],
+    args: argparse.Namespace,
+    cacheable: bool = False,
+) -> int:
+    """Run `check` on each file and merge the return codes.
+
+    With `--jobs`, `check` must be picklable (a module level function or a
+    functools.partial of one).  When `cacheable` is set, `check` must only
+    depend on the contents of the file and on `args`: files which passed with
+    the same contents, arguments and hook code are skipped.
+    """
+    cache = None
+    if cacheable and not args.no_cache:
+        from python.result_cache import ResultCache  # pylint: disable=import-outside-toplevel
+        cache = ResultCache.for_hook(check, args)
+
+    timings.enable(args.timings)
+    hook = timings.hook_id(check)
+    jobs = min(args.jobs or os.cpu_count() or 1, len(filenames))
+    keys: Dict[str, str] = {}
+    with timings.span(hook, '', 'hook'):
+        if jobs > 1:
+            if cache is not None:
+                keys = cache.unknown(filenames, read_bytes)
+                filenames = list(keys)
+            rets = dict(zip(filenames, _check_in_pool(check, filenames, jobs)))
+        else:
+            rets = {}
+            for filename in filenames:
+                with shared_view(), timings.span(hook, filename, 'file'):
+                    if cache is not None:
+                        keys[filename] = cache.key(read_bytes(filename))
+                        if cache.knows(keys[filename]):
+                            continue
+                    rets[filename] = check(filename)
+
+    retv = 0
+    for ret_for_file in rets.values():
+        retv |= ret_for_file
+    if cache is not None:
+        cache.add(keys[filename] for filename, ret_for_file in rets.items() if not ret_for_file)
+        cache.close()
+    return retv
@@ -4,23 +4,30 @@ import xml.sax.handler
 from typing import Optional
 from typing import Sequence
 
+from python.timings import phase
+from python.util import add_runner_arguments
+from python.util import read_bytes
+from python.util import run_per_file
+
+
+def check_file(filename: str) -> int:
+    contents = read_bytes(filename)
+    try:
+        with phase('parse'):
+            xml.sax.parseString(contents, xml.sax.handler.ContentHandler())
+    except xml.sax.SAXException as exc:
+        print(f'{filename}: Failed to xml parse ({exc})')
+        return 1
+    return 0
+
 
 def main(argv: Optional[Sequence[str]] = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*', help='XML filenames to check.')
+    add_runner_arguments(parser)
     args = parser.parse_args(argv)
 
-    retval = 0
-    handler = xml.sax.handler.ContentHandler()
-    for filename in args.filenames:
-        try:
-            with open(filename, 'rb') as xml_file:
-                # https://github.com/python/typeshed/pull/3725
-                xml.sax.parse(xml_file, handler)  # type: ignore
-        except xml.sax.SAXException as exc:
-            print(f'{filename}: Failed to xml parse ({exc})')
-            retval = 1
-    return retval
+    return run_per_file(check_file, args.filenames, args, cacheable=True)
 
 
 if __name__ == '__main__':
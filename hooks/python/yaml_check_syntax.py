@@ -1,4 +1,6 @@
 import argparse
+import functools
+import io
 import sys
 from typing import Any
 from typing import Generator
@@ -6,9 +8,17 @@ from typing import NamedTuple
 from typing import Optional
 from typing import Sequence
 
-import ruamel.yaml
+from python.timings import phase
+from python.util import add_runner_arguments
+from python.util import read_text
+from python.util import run_per_file
 
-YAML = ruamel.yaml.YAML(typ='safe')
+
+@functools.lru_cache(maxsize=None)
+def _yaml() -> Any:
+    # Built on first use: files known to pass from the result cache never need it
+    import ruamel.yaml  # pylint: disable=import-outside-toplevel
+    return ruamel.yaml.YAML(typ='safe')
 
 
 def _exhaust(gen: Generator[str, None, None]) -> None:
@@ -16,12 +26,16 @@ def _exhaust(gen: Generator[str, None, None]) -> None:
         pass
 
 
+def _load(*args: Any, **kwargs: Any) -> None:
+    _yaml().load(*args, **kwargs)
+
+
 def _parse_unsafe(*args: Any, **kwargs: Any) -> None:
-    _exhaust(YAML.parse(*args, **kwargs))
+    _exhaust(_yaml().parse(*args, **kwargs))
 
 
 def _load_all(*args: Any, **kwargs: Any) -> None:
-    _exhaust(YAML.load_all(*args, **kwargs))
+    _exhaust(_yaml().load_all(*args, **kwargs))
 
 
 class Key(NamedTuple):
@@ -30,13 +44,26 @@ class Key(NamedTuple):
 
 
 LOAD_FNS = {
-    Key(multi=False, unsafe=False): YAML.load,
+    Key(multi=False, unsafe=False): _load,
     Key(multi=False, unsafe=True): _parse_unsafe,
     Key(multi=True, unsafe=False): _load_all,
     Key(multi=True, unsafe=True): _parse_unsafe,
 }
 
 
+def check_file(filename: str, multi: bool, unsafe: bool) -> int:
+    from ruamel.yaml import YAMLError  # pylint: disable=import-outside-toplevel
+    stream = io.StringIO(read_text(filename))
+    stream.name = filename  # named in the errors, as with open(filename)
+    try:
+        with phase('parse'):
+            LOAD_FNS[Key(multi=multi, unsafe=unsafe)](stream)
+    except YAMLError as exc:
+        print(exc)
+        return 1
+    return 0
+
+
 def main(argv: Optional[Sequence[str]] = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -57,19 +84,11 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         ),
     )
     parser.add_argument('filenames', nargs='*', help='Filenames to check.')
+    add_runner_arguments(parser)
     args = parser.parse_args(argv)
 
-    load_fn = LOAD_FNS[Key(multi=args.multi, unsafe=args.unsafe)]
-
-    retval = 0
-    for filename in args.filenames:
-        try:
-            with open(filename, encoding='UTF-8') as file_handler:
-                load_fn(file_handler)
-        except ruamel.yaml.YAMLError as exc:
-            print(exc)
-            retval = 1
-    return retval
+    check = functools.partial(check_file, multi=args.multi, unsafe=args.unsafe)
+    return run_per_file(check, args.filenames, args, cacheable=True)
 
 
 if __name__ == '__main__':
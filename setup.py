@@ -5,6 +5,8 @@ from setuptools import setup
 
 SCRIPTS = [
     'git-check-mailmap',
+    'git-check',
+    'git-dirty',
     'git-check-added-large-files',
     'git-check-merge-conflict',
     'git-commit-msg',
@@ -18,8 +20,12 @@ SCRIPTS = [
     'generic-trailing-whitespace-fixer',
     'generic-crlf-forbid',
     'generic-crlf-remove',
+    'generic-mixed-line-ending',
     'generic-tabs-forbid',
     'generic-tabs-remove',
+    'generic-confusables',
+    'generic-scan',
+    'generic-fix-pipeline',
     'c-create-clang-format-cfg',
     'cmake-create-cmake-format-cfg',
     'html-validate',
@@ -44,6 +50,7 @@ SCRIPTS = [
     'toml-check-syntax',
     'xml-check-syntax',
     'yaml-check-syntax',
+    'pch-run',
 ]
 
 SCRIPTS_PATHS = ['python.{}:main'.format(script.replace('-', '_')) for script in SCRIPTS]